@@ -6,8 +6,15 @@ from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from models.user import User, UserResponse
 from database import users_collection
+from services.password_hasher import password_hasher
+from services.revocation import revocation_list
+from services.token_cache import token_cache, token_digest
+from services.user_cache import get_user_response
 from bson import ObjectId
+import math
 import os
+import secrets
+import time
 
 # Security configuration
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-here-change-in-production")
@@ -25,6 +32,14 @@ def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on the bcrypt pool; raises a 503 HTTPException when it is saturated"""
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash on the bcrypt pool; raises a 503 HTTPException when it is saturated"""
+    return await password_hasher.run(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -33,10 +48,28 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    # jti identifies the token so logout can revoke it
+    to_encode.update({"exp": expire, "jti": secrets.token_urlsafe(16)})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def decode_access_token(token: str) -> dict:
+    """Claims of a valid, unrevoked token; raises jwt.PyJWTError otherwise
+    
+    Verified tokens are cached by digest until they expire, so the same
+    token sent on every request is only signature-checked once. The
+    revocation check is an in-memory lookup, done on every call.
+    """
+    key = token_digest(token)
+    payload = token_cache.get(key)
+    if payload is None or payload.get("exp", math.inf) <= time.time():
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        token_cache.remember(key, payload)
+    
+    if revocation_list.is_revoked(payload.get("jti")):
+        raise jwt.InvalidTokenError("Token has been revoked")
+    return payload
+
 async def get_user_by_email(email: str) -> Optional[User]:
     """Get user by email"""
     user_doc = await users_collection.find_one({"email": email})
@@ -59,12 +92,12 @@ async def authenticate_user(email: str, password: str) -> Optional[User]:
     user = await get_user_by_email(email)
     if not user:
         return None
-    if not verify_password(password, user.password):
+    if not await verify_password_async(password, user.password):
         return None
     return user
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> UserResponse:
-    """Get current authenticated user"""
+    """Get current authenticated user (profile from the user cache)"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -72,26 +105,18 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     )
     
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_access_token(credentials.credentials)
         user_id: str = payload.get("sub")
         if user_id is None:
             raise credentials_exception
     except jwt.PyJWTError:
         raise credentials_exception
     
-    user = await get_user_by_id(user_id)
+    user = await get_user_response(user_id)
     if user is None:
         raise credentials_exception
     
-    return UserResponse(
-        id=str(user.id),
-        name=user.name,
-        email=user.email,
-        avatar=user.avatar,
-        rating=user.rating,
-        member_since=user.member_since,
-        is_verified=user.is_verified
-    )
+    return user
 
 async def get_current_user_optional(credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False))) -> Optional[UserResponse]:
     """Get current authenticated user (optional for non-protected routes)"""
@@ -99,23 +124,11 @@ async def get_current_user_optional(credentials: Optional[HTTPAuthorizationCrede
         return None
     
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_access_token(credentials.credentials)
         user_id: str = payload.get("sub")
         if user_id is None:
             return None
     except jwt.PyJWTError:
         return None
     
-    user = await get_user_by_id(user_id)
-    if user is None:
-        return None
-    
-    return UserResponse(
-        id=str(user.id),
-        name=user.name,
-        email=user.email,
-        avatar=user.avatar,
-        rating=user.rating,
-        member_since=user.member_since,
-        is_verified=user.is_verified
-    )
\ No newline at end of file
+    return await get_user_response(user_id)
\ No newline at end of file
@@ -1,5 +1,5 @@
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import IndexModel, ASCENDING, TEXT
+from pymongo import IndexModel, ASCENDING, DESCENDING, TEXT
 import os
 from dotenv import load_dotenv
 from pathlib import Path
@@ -17,6 +17,12 @@ users_collection = db.users
 products_collection = db.products
 orders_collection = db.orders
 bids_collection = db.bids
+idempotency_collection = db.idempotency_keys
+carts_collection = db.carts
+revoked_tokens_collection = db.revoked_tokens
+
+# How long an Idempotency-Key (and the response stored for it) is remembered
+IDEMPOTENCY_KEY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_KEY_TTL_SECONDS", "86400"))
 
 async def create_indexes():
     """Create database indexes for better performance"""
@@ -32,16 +38,30 @@ async def create_indexes():
     await products_collection.create_index([("seller", ASCENDING)])
     await products_collection.create_index([("is_active", ASCENDING)])
     await products_collection.create_index([("created_at", ASCENDING)])
+    await products_collection.create_index([("updated_at", ASCENDING)])
+    
+    # Listing sort indexes (sort field + _id) so keyset pages seek instead of scan
+    await products_collection.create_index([("is_active", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)])
+    await products_collection.create_index([("is_active", ASCENDING), ("price", ASCENDING), ("_id", ASCENDING)])
+    await products_collection.create_index([("is_active", ASCENDING), ("rating", ASCENDING), ("_id", ASCENDING)])
+    await products_collection.create_index([("is_active", ASCENDING), ("auction_status", ASCENDING), ("auction_end_time", ASCENDING), ("_id", ASCENDING)])
     
-    # Order indexes
-    await orders_collection.create_index([("user_id", ASCENDING)])
+    # Order indexes; history pages seek on (user_id, created_at, _id)
+    await orders_collection.create_index([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)])
     await orders_collection.create_index([("status", ASCENDING)])
     await orders_collection.create_index([("created_at", ASCENDING)])
     
-    # Bid indexes
-    await bids_collection.create_index([("product_id", ASCENDING)])
+    # Bid indexes; history pages seek on (product_id, created_at, _id)
+    await bids_collection.create_index([("product_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)])
     await bids_collection.create_index([("user_id", ASCENDING)])
     await bids_collection.create_index([("created_at", ASCENDING)])
+    
+    # Idempotency keys expire on their own
+    await idempotency_collection.create_index([("created_at", ASCENDING)], expireAfterSeconds=IDEMPOTENCY_KEY_TTL_SECONDS)
+    
+    # Revoked tokens are dropped once the token itself would have expired
+    await revoked_tokens_collection.create_index([("expires_at", ASCENDING)], expireAfterSeconds=0)
+    await revoked_tokens_collection.create_index([("revoked_at", ASCENDING)])
 
 async def close_db_connection():
     """Close database connection"""
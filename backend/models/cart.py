@@ -0,0 +1,30 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+from models.order import ShippingAddress
+
+class CartItemAdd(BaseModel):
+    product_id: str
+    quantity: int = Field(1, ge=1)
+
+class CartItemUpdate(BaseModel):
+    product_id: str
+    quantity: int = Field(..., ge=0)  # 0 removes the item
+
+class CartItemResponse(BaseModel):
+    product_id: str
+    name: Optional[str] = None
+    price: Optional[float] = None
+    quantity: int
+    image: str = ""
+    available: bool  # product still on sale with enough stock
+
+class CartResponse(BaseModel):
+    items: List[CartItemResponse]
+    item_count: int
+    subtotal: float
+    updated_at: Optional[datetime] = None
+
+class CartCheckout(BaseModel):
+    shipping_address: ShippingAddress
+    payment_method: str = "Credit Card"
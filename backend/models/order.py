@@ -54,4 +54,12 @@ class OrderResponse(BaseModel):
     shipping_address: Optional[ShippingAddress]
     payment_method: str
     tracking_number: Optional[str]
-    created_at: datetime
\ No newline at end of file
+    created_at: datetime
+
+class OrderSummaryResponse(BaseModel):
+    id: str
+    status: str
+    total_amount: float
+    item_count: int
+    thumbnail: str
+    created_at: datetime
@@ -19,8 +19,10 @@ class Product(BaseModel):
     seller_name: str
     is_auction: bool = False
     auction_end_time: Optional[datetime] = None
+    auction_status: Optional[str] = None  # open, closed (auctions only)
     current_bid: Optional[float] = None
     bid_count: int = 0
+    winning_bid: Optional[dict] = None
     buy_it_now: bool = True
     quantity: int = 1
     brand: Optional[str] = None
@@ -76,6 +78,7 @@ class ProductResponse(BaseModel):
     seller_name: str
     is_auction: bool
     auction_end_time: Optional[datetime]
+    auction_status: Optional[str] = None
     current_bid: Optional[float]
     bid_count: int
     buy_it_now: bool
@@ -85,12 +88,28 @@ class ProductResponse(BaseModel):
     review_count: int
     created_at: datetime
 
+class ProductCardResponse(BaseModel):
+    id: str
+    name: str
+    price: float
+    original_price: Optional[float]
+    image: Optional[str]
+    listing_type: str
+    is_auction: bool
+    auction_end_time: Optional[datetime]
+    current_bid: Optional[float]
+    bid_count: int
+    buy_it_now: bool
+    rating: float
+    review_count: int
+
 class Bid(BaseModel):
     id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
     product_id: PyObjectId
     user_id: PyObjectId
     user_name: str
     amount: float
+    is_proxy: bool = False  # placed automatically from the bidder's maximum
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
     class Config:
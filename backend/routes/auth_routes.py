@@ -1,14 +1,18 @@
 from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi.security import HTTPAuthorizationCredentials
 from datetime import timedelta
 from models.user import User, UserCreate, UserLogin, UserResponse
 from database import users_collection
 from auth import (
-    get_password_hash,
+    get_password_hash_async,
     authenticate_user,
     create_access_token,
     get_current_user,
+    decode_access_token,
+    security,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
+from services.revocation import revocation_list
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
@@ -24,7 +28,7 @@ async def register_user(user_data: UserCreate):
         )
     
     # Hash password and create user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     user = User(
         name=user_data.name,
         email=user_data.email,
@@ -94,6 +98,13 @@ async def get_current_user_info(current_user: UserResponse = Depends(get_current
     return current_user
 
 @router.post("/logout", response_model=dict)
-async def logout_user(current_user: UserResponse = Depends(get_current_user)):
-    """Logout user (client should remove token)"""
+async def logout_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Logout user: revoke the token used for this request (client should remove it too)"""
+    payload = decode_access_token(credentials.credentials)
+    # Tokens issued before jti existed can't be revoked; they run out at their exp
+    if payload.get("jti"):
+        await revocation_list.revoke(payload["jti"], payload["exp"])
     return {"message": "Successfully logged out"}
\ No newline at end of file
@@ -0,0 +1,102 @@
+from fastapi import APIRouter, HTTPException, status, Depends
+from models.cart import CartItemAdd, CartItemUpdate, CartResponse
+from models.user import UserResponse
+from auth import get_current_user
+from services.cart import Cart, cart_store
+from services.product_cache import get_active_product
+from services.serializer import json_response
+from bson import ObjectId
+
+router = APIRouter(prefix="/api/cart", tags=["Cart"])
+
+def cart_summary(cart: Cart, message: str) -> dict:
+    """Unpriced cart returned by edits, which never wait on a product query"""
+    return {
+        "message": message,
+        "items": [{"product_id": str(product_id), "quantity": quantity} for product_id, quantity in cart.items.items()],
+        "item_count": sum(cart.items.values())
+    }
+
+def parse_product_id(product_id: str) -> ObjectId:
+    if not ObjectId.is_valid(product_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid product ID"
+        )
+    return ObjectId(product_id)
+
+async def check_purchasable(product_id: ObjectId, quantity: int):
+    """404/400 unless the product can be bought in this quantity (cached product, so it may lag stock slightly)"""
+    product = await get_active_product(product_id)
+    if not product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found"
+        )
+    if product["is_auction"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cannot purchase auction item: {product['name']}"
+        )
+    if product["quantity"] < quantity:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Insufficient quantity for {product['name']}"
+        )
+
+@router.get("", response_model=CartResponse)
+async def get_cart(current_user: UserResponse = Depends(get_current_user)):
+    """Get the current user's cart, priced at current product prices"""
+    cart = await cart_store.get(ObjectId(current_user.id))
+    return json_response(await cart_store.price(cart))
+
+@router.post("/add", response_model=dict)
+async def add_to_cart(
+    item: CartItemAdd,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Add a product to the cart (adds to its quantity if already there)"""
+    product_id = parse_product_id(item.product_id)
+    user_id = ObjectId(current_user.id)
+    
+    cart = await cart_store.get(user_id)
+    await check_purchasable(product_id, cart.items.get(product_id, 0) + item.quantity)
+    
+    try:
+        cart = await cart_store.add(user_id, product_id, item.quantity)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return json_response(cart_summary(cart, "Product added to cart"))
+
+@router.put("/update", response_model=dict)
+async def update_cart_item(
+    item: CartItemUpdate,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Set a cart item's quantity; 0 removes it"""
+    product_id = parse_product_id(item.product_id)
+    if item.quantity:
+        await check_purchasable(product_id, item.quantity)
+    
+    try:
+        cart = await cart_store.set_quantity(ObjectId(current_user.id), product_id, item.quantity)
+    except LookupError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    
+    return json_response(cart_summary(cart, "Cart updated"))
+
+@router.delete("/remove/{product_id}", response_model=dict)
+async def remove_from_cart(
+    product_id: str,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Remove a product from the cart"""
+    cart = await cart_store.remove(ObjectId(current_user.id), parse_product_id(product_id))
+    return json_response(cart_summary(cart, "Product removed from cart"))
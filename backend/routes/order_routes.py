@@ -1,9 +1,13 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
-from models.order import Order, OrderCreate, OrderResponse, OrderItem
+from fastapi import APIRouter, HTTPException, status, Depends, Header
+from typing import List, Optional, Tuple
+from models.cart import CartCheckout
+from models.order import Order, OrderCreate, OrderResponse, OrderItem, ShippingAddress
 from models.user import UserResponse
 from database import orders_collection, products_collection
 from auth import get_current_user
+from services.cart import cart_store
+from services.idempotency import idempotency, request_fingerprint
+from services.stock import load_order_products, release_stock, reserve_stock
 from bson import ObjectId
 from datetime import datetime
 
@@ -12,25 +16,105 @@ router = APIRouter(prefix="/api/orders", tags=["Orders"])
 @router.post("/create", response_model=OrderResponse)
 async def create_order(
     order_data: OrderCreate,
-    current_user: UserResponse = Depends(get_current_user)
+    current_user: UserResponse = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
-    """Create a new order"""
-    # Validate all products exist and calculate total
-    total_amount = 0
-    validated_items = []
+    """Create a new order
+    
+    Send an Idempotency-Key header to make retries safe: a retry with the
+    same key gets the first response back instead of placing a second order.
+    """
+    return await idempotency.run(
+        idempotency_key,
+        f"orders:{current_user.id}",
+        request_fingerprint(order_data.dict()),
+        lambda: place_order(
+            [(item.product_id, item.quantity) for item in order_data.items],
+            order_data.shipping_address,
+            order_data.payment_method,
+            current_user
+        )
+    )
+
+@router.post("/checkout", response_model=OrderResponse)
+async def checkout_cart(
+    checkout: CartCheckout,
+    current_user: UserResponse = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    """Create an order from the current user's server-side cart
     
-    for item in order_data.items:
-        if not ObjectId.is_valid(item.product_id):
+    The cart is priced at current prices by the order's single product
+    query; what the order bought is then taken out of the cart. Accepts an
+    Idempotency-Key like /create.
+    """
+    user_id = ObjectId(current_user.id)
+    
+    async def order_cart() -> dict:
+        cart = await cart_store.get(user_id)
+        if not cart.items:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid product ID: {item.product_id}"
+                detail="Cart is empty"
             )
-        
-        product = await products_collection.find_one({"_id": ObjectId(item.product_id), "is_active": True})
+        quantities = dict(cart.items)
+        order = await place_order(
+            [(str(product_id), quantity) for product_id, quantity in quantities.items()],
+            checkout.shipping_address,
+            checkout.payment_method,
+            current_user
+        )
+        await cart_store.take(user_id, quantities)
+        return order
+    
+    return await idempotency.run(
+        idempotency_key,
+        f"checkout:{current_user.id}",
+        request_fingerprint(checkout.dict()),
+        order_cart
+    )
+
+async def place_order(
+    items: List[Tuple[str, int]],
+    shipping_address: ShippingAddress,
+    payment_method: str,
+    current_user: UserResponse
+) -> dict:
+    """Validate, reserve stock and insert an order of (product id, quantity) items;
+    returns the OrderResponse content
+    
+    All products load in one query and stock is reserved for the whole cart
+    in one conditional bulk write, so two buyers can't both get the last unit.
+    """
+    # Total quantity per product (a cart may list a product more than once)
+    quantities = {}
+    for item_product_id, quantity in items:
+        if not ObjectId.is_valid(item_product_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid product ID: {item_product_id}"
+            )
+        if quantity < 1:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid quantity for product: {item_product_id}"
+            )
+        product_id = ObjectId(item_product_id)
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+    
+    products = await load_order_products(products_collection, list(quantities))
+    
+    # Validate all products exist and calculate total
+    total_amount = 0
+    validated_items = []
+    
+    for item_product_id, quantity in items:
+        product_id = ObjectId(item_product_id)
+        product = products.get(product_id)
         if not product:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Product not found: {item.product_id}"
+                detail=f"Product not found: {item_product_id}"
             )
         
         # Check if product is available (not auction or has quantity)
@@ -40,21 +124,21 @@ async def create_order(
                 detail=f"Cannot purchase auction item: {product['name']}"
             )
         
-        if product["quantity"] < item.quantity:
+        if product["quantity"] < quantities[product_id]:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Insufficient quantity for {product['name']}"
             )
         
         validated_items.append(OrderItem(
-            product_id=item.product_id,
+            product_id=item_product_id,
             name=product["name"],
             price=product["price"],
-            quantity=item.quantity,
+            quantity=quantity,
             image=product["images"][0] if product["images"] else ""
         ))
         
-        total_amount += product["price"] * item.quantity
+        total_amount += product["price"] * quantity
     
     # Calculate tax (8% for demo)
     tax_amount = total_amount * 0.08
@@ -66,20 +150,31 @@ async def create_order(
         items=validated_items,
         total_amount=total_amount,
         tax_amount=tax_amount,
-        shipping_address=order_data.shipping_address,
-        payment_method=order_data.payment_method
+        shipping_address=shipping_address,
+        payment_method=payment_method
     )
     
-    # Insert order
-    result = await orders_collection.insert_one(order.dict(by_alias=True))
-    
-    # Update product quantities
-    for item in validated_items:
-        await products_collection.update_one(
-            {"_id": ObjectId(item.product_id)},
-            {"$inc": {"quantity": -item.quantity}}
+    # Reserve stock; the check above can be stale by now, this can't
+    try:
+        await reserve_stock(products_collection, quantities)
+    except LookupError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
         )
     
+    # Insert order, handing the stock back if that fails
+    try:
+        result = await orders_collection.insert_one(order.dict(by_alias=True))
+    except Exception:
+        await release_stock(products_collection, quantities)
+        raise
+    
     return OrderResponse(
         id=str(result.inserted_id),
         user_name=order.user_name,
@@ -92,7 +187,7 @@ async def create_order(
         payment_method=order.payment_method,
         tracking_number=order.tracking_number,
         created_at=order.created_at
-    )
+    ).dict()
 
 @router.get("/{order_id}", response_model=OrderResponse)
 async def get_order(
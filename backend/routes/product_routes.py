@@ -1,30 +1,50 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Header, Query, Request
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from models.product import Product, ProductCreate, ProductUpdate, ProductResponse, Bid
 from models.user import UserResponse
-from database import products_collection, bids_collection, users_collection
+from database import products_collection, users_collection
 from auth import get_current_user, get_current_user_optional
 from bson import ObjectId
-from datetime import datetime
+from services.pagination import apply_cursor, cursor_for_document, decode_cursor, encode_cursor
+from services.totals import COUNT_MODE_PATTERN, paginate
+from services.product_cache import get_active_product, get_product_version
+from services.bid_engine import bid_engine
+from services.bid_history import get_bid_history
+from services.idempotency import idempotency, request_fingerprint
+from services.live import broadcaster
+from services.facets import get_product_facets, load_categories
+from services.etag import (
+    PRODUCT_VERSION_PROJECTION,
+    etag_headers,
+    etag_matches,
+    make_etag,
+    not_modified,
+    product_version
+)
+from services.search_index import search_index
+from services.suggest_index import suggest_index
+from services.serializer import (
+    VIEW_PATTERN,
+    card_projection,
+    json_response,
+    product_to_dict,
+    serialize_products
+)
 import math
 
 router = APIRouter(prefix="/api/products", tags=["Products"])
 
-@router.get("/", response_model=dict)
-async def get_products(
-    page: int = Query(1, ge=1),
-    limit: int = Query(20, ge=1, le=100),
+def build_product_filter(
     category: Optional[str] = None,
     search: Optional[str] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
     condition: Optional[str] = None,
     listing_type: Optional[str] = None,
-    brand: Optional[str] = None,
-    sort_by: Optional[str] = "created_at",
-    sort_order: Optional[str] = "desc"
-):
-    """Get products with filtering, search, and pagination"""
+    brand: Optional[str] = None
+) -> dict:
+    """Build the Mongo filter shared by the listing and facet endpoints"""
     # Build filter query
     filter_query = {"is_active": True}
     
@@ -51,8 +71,36 @@ async def get_products(
     if brand:
         filter_query["brand"] = brand
     
-    # Calculate skip value for pagination
-    skip = (page - 1) * limit
+    return filter_query
+
+@router.get("/", response_model=dict)
+async def get_products(
+    page: int = Query(1, ge=1),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    count_mode: str = Query("cached", pattern=COUNT_MODE_PATTERN),
+    view: str = Query("full", pattern=VIEW_PATTERN),
+    category: Optional[str] = None,
+    search: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    condition: Optional[str] = None,
+    listing_type: Optional[str] = None,
+    brand: Optional[str] = None,
+    sort_by: Optional[str] = "created_at",
+    sort_order: Optional[str] = "desc"
+):
+    """Get products with filtering, search, and pagination
+
+    Pass the `next_cursor` of a previous response as `cursor` to page by
+    keyset instead of page number; deep pages then cost the same as the first.
+    `count_mode` picks how totals are computed: exact, cached (default),
+    estimated (capped), or has_next (no count at all). `view=card` returns
+    the slim ProductCardResponse shape and projects only its fields.
+    """
+    filter_query = build_product_filter(
+        category, search, min_price, max_price, condition, listing_type, brand
+    )
     
     # Sort configuration
     sort_direction = -1 if sort_order == "desc" else 1
@@ -61,260 +109,325 @@ async def get_products(
     # Special sorting for ending soon (auctions)
     if sort_by == "ending_soon":
         sort_field = "auction_end_time"
-        filter_query["is_auction"] = True
-        filter_query["auction_end_time"] = {"$gte": datetime.utcnow()}
-    
-    # Get total count for pagination
-    total_count = await products_collection.count_documents(filter_query)
-    total_pages = math.ceil(total_count / limit)
-    
-    # Get products
-    cursor = products_collection.find(filter_query).sort(sort_field, sort_direction).skip(skip).limit(limit)
-    products = await cursor.to_list(length=limit)
-    
-    # Convert to response format
-    product_responses = []
-    for product in products:
-        product_responses.append(ProductResponse(
-            id=str(product["_id"]),
-            name=product["name"],
-            description=product["description"],
-            price=product["price"],
-            original_price=product.get("original_price"),
-            images=product["images"],
-            category=product["category"],
-            subcategory=product.get("subcategory"),
-            condition=product["condition"],
-            listing_type=product["listing_type"],
-            seller=str(product["seller"]),
-            seller_name=product["seller_name"],
-            is_auction=product["is_auction"],
-            auction_end_time=product.get("auction_end_time"),
-            current_bid=product.get("current_bid"),
-            bid_count=product["bid_count"],
-            buy_it_now=product["buy_it_now"],
-            quantity=product["quantity"],
-            brand=product.get("brand"),
-            rating=product["rating"],
-            review_count=product["review_count"],
-            created_at=product["created_at"]
-        ))
-    
-    return {
-        "products": product_responses,
-        "pagination": {
-            "current_page": page,
-            "total_pages": total_pages,
-            "total_count": total_count,
-            "has_next": page < total_pages,
-            "has_prev": page > 1
-        }
-    }
+        filter_query["auction_status"] = "open"
+    
+    # _id breaks ties so keyset cursors are stable
+    sort_spec = [(sort_field, sort_direction), ("_id", sort_direction)]
+    
+    # Card view keeps the sort key so next_cursor can still be built
+    projection = card_projection(sort_field) if view == "card" else None
+    
+    if cursor:
+        try:
+            apply_cursor(filter_query, cursor, sort_field, sort_direction)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        
+        # Fetch one extra row to learn whether another page exists
+        db_cursor = products_collection.find(filter_query, projection).sort(sort_spec).limit(limit + 1)
+        products = await db_cursor.to_list(length=limit + 1)
+        has_next = len(products) > limit
+        products = products[:limit]
+        pagination = {"limit": limit, "has_next": has_next}
+    else:
+        db_cursor = products_collection.find(filter_query, projection).sort(sort_spec)
+        products, pagination = await paginate(
+            products_collection, db_cursor, filter_query, page, limit, count_mode
+        )
+        has_next = pagination["has_next"]
+    
+    next_cursor = cursor_for_document(sort_field, sort_direction, products[-1]) if has_next and products else None
+    pagination["next_cursor"] = next_cursor
+    return json_response({
+        "products": serialize_products(products, view),
+        "pagination": pagination
+    })
 
 @router.get("/categories", response_model=List[str])
-async def get_categories():
+async def get_categories(request: Request):
     """Get all product categories"""
-    categories = await products_collection.distinct("category")
-    return categories
+    categories, etag = await load_categories(products_collection)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    return json_response(categories, headers=etag_headers(etag))
+
+@router.get("/facets", response_model=dict)
+async def get_facets(
+    category: Optional[str] = None,
+    search: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    condition: Optional[str] = None,
+    listing_type: Optional[str] = None,
+    brand: Optional[str] = None
+):
+    """Get sidebar facet counts and a price histogram for the given filters
+
+    Each facet ignores its own filter, so the sidebar keeps showing the
+    alternatives for the current selection.
+    """
+    filter_query = build_product_filter(
+        category, search, min_price, max_price, condition, listing_type, brand
+    )
+    facets = await get_product_facets(products_collection, filter_query)
+    return json_response(facets)
+
+@router.get("/suggest", response_model=dict)
+async def suggest_products(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=20)
+):
+    """Typeahead completions from product names, brands and categories
+
+    Served from the in-memory prefix index, most popular first.
+    """
+    return json_response({
+        "query": q,
+        "suggestions": suggest_index.suggest(q, limit)
+    })
 
 @router.get("/search", response_model=dict)
 async def search_products(
     q: str = Query(..., min_length=1),
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    view: str = Query("full", pattern=VIEW_PATTERN),
+    fuzzy: str = Query("auto", pattern="^(auto|on|off)$"),
     category: Optional[str] = None
 ):
-    """Search products by name and description"""
-    filter_query = {
-        "is_active": True,
-        "$text": {"$search": q}
-    }
-    
-    if category and category != "All Categories":
-        filter_query["category"] = category
-    
-    # Calculate skip value for pagination
-    skip = (page - 1) * limit
-    
-    # Get total count
-    total_count = await products_collection.count_documents(filter_query)
-    total_pages = math.ceil(total_count / limit)
-    
-    # Get products with text search score
-    cursor = products_collection.find(
-        filter_query,
-        {"score": {"$meta": "textScore"}}
-    ).sort([("score", {"$meta": "textScore"})]).skip(skip).limit(limit)
-    
-    products = await cursor.to_list(length=limit)
-    
-    # Convert to response format
-    product_responses = []
-    for product in products:
-        product_responses.append(ProductResponse(
-            id=str(product["_id"]),
-            name=product["name"],
-            description=product["description"],
-            price=product["price"],
-            original_price=product.get("original_price"),
-            images=product["images"],
-            category=product["category"],
-            subcategory=product.get("subcategory"),
-            condition=product["condition"],
-            listing_type=product["listing_type"],
-            seller=str(product["seller"]),
-            seller_name=product["seller_name"],
-            is_auction=product["is_auction"],
-            auction_end_time=product.get("auction_end_time"),
-            current_bid=product.get("current_bid"),
-            bid_count=product["bid_count"],
-            buy_it_now=product["buy_it_now"],
-            quantity=product["quantity"],
-            brand=product.get("brand"),
-            rating=product["rating"],
-            review_count=product["review_count"],
-            created_at=product["created_at"]
-        ))
-    
-    return {
-        "products": product_responses,
-        "query": q,
-        "pagination": {
+    """Search products by name, brand, category and description
+
+    Ranked with BM25 over the in-memory search index. Supports "quoted
+    phrases", prefix* terms and -exclusions; `cursor` pages by (score, _id).
+    `fuzzy=auto` (default) retries with trigram typo correction when the
+    exact query finds nothing; `on` always corrects, `off` never does.
+    """
+    if category == "All Categories":
+        category = None
+    
+    after = None
+    if cursor:
+        try:
+            score, last_id = decode_cursor(cursor, "score", -1)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        after = (score, str(last_id))
+    
+    # Rank in memory; one extra hit tells us whether another page exists
+    offset = 0 if cursor else (page - 1) * limit
+    use_fuzzy = fuzzy == "on"
+    hits, total_count = await search_index.search_async(q, category, offset, limit + 1, after, use_fuzzy)
+    if not total_count and fuzzy == "auto":
+        use_fuzzy = True
+        hits, total_count = await search_index.search_async(q, category, offset, limit + 1, after, use_fuzzy)
+    has_next = len(hits) > limit
+    hits = hits[:limit]
+    
+    # Load the page's documents in one round trip and restore rank order
+    projection = card_projection() if view == "card" else None
+    product_ids = [ObjectId(product_id) for product_id, _ in hits]
+    db_cursor = products_collection.find({"_id": {"$in": product_ids}, "is_active": True}, projection)
+    documents = {str(product["_id"]): product async for product in db_cursor}
+    products = [documents[product_id] for product_id, _ in hits if product_id in documents]
+    
+    next_cursor = None
+    if has_next and hits:
+        last_id, last_score = hits[-1]
+        next_cursor = encode_cursor("score", -1, last_score, ObjectId(last_id))
+    
+    if cursor:
+        pagination = {"limit": limit, "has_next": has_next}
+    else:
+        total_pages = math.ceil(total_count / limit)
+        pagination = {
             "current_page": page,
             "total_pages": total_pages,
             "total_count": total_count,
-            "has_next": page < total_pages,
+            "total_exact": True,
+            "has_next": has_next,
             "has_prev": page > 1
         }
-    }
+    pagination["next_cursor"] = next_cursor
+    
+    return json_response({
+        "products": serialize_products(products, view),
+        "query": q,
+        "fuzzy": use_fuzzy,
+        "pagination": pagination
+    })
 
 @router.get("/{product_id}", response_model=ProductResponse)
-async def get_product(product_id: str):
-    """Get single product by ID"""
+async def get_product(product_id: str, request: Request):
+    """Get single product by ID
+
+    Responses carry a strong ETag built from the product's version fields;
+    a matching If-None-Match is answered 304 after a version-only lookup.
+    """
     if not ObjectId.is_valid(product_id):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid product ID"
         )
     
-    product = await products_collection.find_one({"_id": ObjectId(product_id), "is_active": True})
+    if request.headers.get("if-none-match"):
+        version = await get_product_version(ObjectId(product_id))
+        if version:
+            etag = make_etag(*product_version(version))
+            if etag_matches(request, etag):
+                return not_modified(etag)
+    
+    product = await get_active_product(ObjectId(product_id))
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
         )
     
-    return ProductResponse(
-        id=str(product["_id"]),
-        name=product["name"],
-        description=product["description"],
-        price=product["price"],
-        original_price=product.get("original_price"),
-        images=product["images"],
-        category=product["category"],
-        subcategory=product.get("subcategory"),
-        condition=product["condition"],
-        listing_type=product["listing_type"],
-        seller=str(product["seller"]),
-        seller_name=product["seller_name"],
-        is_auction=product["is_auction"],
-        auction_end_time=product.get("auction_end_time"),
-        current_bid=product.get("current_bid"),
-        bid_count=product["bid_count"],
-        buy_it_now=product["buy_it_now"],
-        quantity=product["quantity"],
-        brand=product.get("brand"),
-        rating=product["rating"],
-        review_count=product["review_count"],
-        created_at=product["created_at"]
-    )
+    etag = make_etag(*product_version(product))
+    return json_response(product_to_dict(product), headers=etag_headers(etag))
 
 @router.post("/{product_id}/bid", response_model=dict)
 async def place_bid(
     product_id: str,
-    bid_amount: float,
-    current_user: UserResponse = Depends(get_current_user)
+    bid_amount: Optional[float] = None,
+    max_bid: Optional[float] = None,
+    current_user: UserResponse = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
-    """Place a bid on an auction item"""
+    """Place a bid on an auction item
+
+    Pass `bid_amount` for an exact bid, or `max_bid` for a proxy bid: the
+    maximum stays secret and the system bids for you, one increment above
+    competing bids, up to that amount. Bids are decided by the product's
+    single writer in the bid engine and persisted in batches; the response
+    is sent once the bid is stored. With an Idempotency-Key header, a retry
+    gets the first response back instead of bidding twice.
+    """
     if not ObjectId.is_valid(product_id):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid product ID"
         )
     
-    # Get product
-    product = await products_collection.find_one({"_id": ObjectId(product_id), "is_active": True})
-    if not product:
+    if (bid_amount is None) == (max_bid is None):
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Product not found"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide either bid_amount or max_bid"
         )
     
-    # Check if it's an auction
-    if not product["is_auction"]:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="This item is not an auction"
+    async def submit() -> dict:
+        # Create bid record
+        bid = Bid(
+            product_id=ObjectId(product_id),
+            user_id=ObjectId(current_user.id),
+            user_name=current_user.name,
+            amount=bid_amount if max_bid is None else max_bid
         )
+        
+        try:
+            result = await bid_engine.submit(bid.dict(by_alias=True), proxy=max_bid is not None)
+        except LookupError as e:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=str(e)
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        
+        return {
+            "message": "Bid placed successfully" if max_bid is None else "Maximum bid placed successfully",
+            **result
+        }
     
-    # Check if auction has ended
-    if product["auction_end_time"] and product["auction_end_time"] < datetime.utcnow():
+    return await idempotency.run(
+        idempotency_key,
+        f"bids:{current_user.id}",
+        request_fingerprint(product_id, bid_amount, max_bid),
+        submit
+    )
+
+@router.get("/{product_id}/bids", response_model=List[dict])
+async def get_product_bids(
+    product_id: str,
+    request: Request,
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = None
+):
+    """Get bid history for a product, newest first
+
+    Pass the X-Next-Cursor header of a response as `cursor` for the next
+    (older) page. The ETag follows the product's bid_count and current_bid,
+    so polling clients get a 304 until a new bid lands.
+    """
+    if not ObjectId.is_valid(product_id):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="This auction has ended"
+            detail="Invalid product ID"
         )
     
-    # Check if bid amount is higher than current bid
-    current_bid = product.get("current_bid", product["price"])
-    if bid_amount <= current_bid:
+    # Read the version before the bids, so the tag never claims a newer history than the body
+    version = await products_collection.find_one(
+        {"_id": ObjectId(product_id)},
+        {**PRODUCT_VERSION_PROJECTION, "last_bid._id": 1}
+    ) or {}
+    etag = make_etag("bids", product_id, version.get("bid_count"), version.get("current_bid"), limit, cursor)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    try:
+        bid_history, next_cursor = await get_bid_history(
+            ObjectId(product_id),
+            version.get("bid_count"),
+            limit,
+            cursor,
+            (version.get("last_bid") or {}).get("_id")
+        )
+    except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Bid amount must be higher than current bid of ${current_bid}"
+            detail=str(e)
         )
     
-    # Create bid record
-    bid = Bid(
-        product_id=ObjectId(product_id),
-        user_id=ObjectId(current_user.id),
-        user_name=current_user.name,
-        amount=bid_amount
-    )
-    
-    # Insert bid and update product
-    await bids_collection.insert_one(bid.dict(by_alias=True))
-    await products_collection.update_one(
-        {"_id": ObjectId(product_id)},
-        {
-            "$set": {"current_bid": bid_amount},
-            "$inc": {"bid_count": 1}
-        }
-    )
-    
-    return {
-        "message": "Bid placed successfully",
-        "bid_amount": bid_amount,
-        "current_bid": bid_amount
-    }
+    headers = etag_headers(etag)
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return json_response(bid_history, headers=headers)
 
-@router.get("/{product_id}/bids", response_model=List[dict])
-async def get_product_bids(product_id: str):
-    """Get bid history for a product"""
+@router.get("/{product_id}/live")
+async def stream_product_bids(product_id: str):
+    """Live auction updates as Server-Sent Events
+
+    Sends a `snapshot` event with the current bid, then a `bid` event for
+    every accepted bid, with heartbeats while idle, and `ended` with the
+    winning bid when the auction closes. Clients that fall too far behind
+    are disconnected and should reconnect.
+    """
     if not ObjectId.is_valid(product_id):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid product ID"
         )
     
-    # Get bids for the product
-    cursor = bids_collection.find({"product_id": ObjectId(product_id)}).sort("created_at", -1)
-    bids = await cursor.to_list(length=100)
-    
-    bid_history = []
-    for bid in bids:
-        bid_history.append({
-            "user_name": bid["user_name"],
-            "amount": bid["amount"],
-            "created_at": bid["created_at"]
-        })
+    book = await bid_engine.get_book(ObjectId(product_id))
+    if book is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No open auction found"
+        )
     
-    return bid_history
\ No newline at end of file
+    return StreamingResponse(
+        broadcaster.stream(book.product_id, book.snapshot()),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
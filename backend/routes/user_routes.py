@@ -1,10 +1,22 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from typing import List, Optional, Union
 from models.user import UserResponse, UserUpdate
-from models.product import ProductResponse
-from models.order import OrderResponse
+from models.product import ProductResponse, ProductCardResponse
+from models.order import OrderResponse, OrderSummaryResponse
 from database import users_collection, products_collection, orders_collection
 from auth import get_current_user
+from services.pagination import apply_cursor, cursor_for_document
+from services.serializer import (
+    ORDER_SUMMARY_PROJECTION,
+    ORDER_VIEW_PATTERN,
+    VIEW_PATTERN,
+    card_projection,
+    json_response,
+    order_to_dict,
+    order_to_summary,
+    serialize_products
+)
+from services.user_cache import invalidate_user
 from bson import ObjectId
 
 router = APIRouter(prefix="/api/users", tags=["Users"])
@@ -31,6 +43,7 @@ async def update_user_profile(
             {"_id": ObjectId(current_user.id)},
             {"$set": update_data}
         )
+        invalidate_user(current_user.id)
         
         # Get updated user data
         updated_user = await users_collection.find_one({"_id": ObjectId(current_user.id)})
@@ -46,32 +59,51 @@ async def update_user_profile(
     
     return current_user
 
-@router.get("/orders", response_model=List[OrderResponse])
-async def get_user_orders(current_user: UserResponse = Depends(get_current_user)):
-    """Get current user's order history"""
-    cursor = orders_collection.find({"user_id": ObjectId(current_user.id)}).sort("created_at", -1)
-    orders = await cursor.to_list(length=100)
+@router.get("/orders", response_model=List[Union[OrderResponse, OrderSummaryResponse]])
+async def get_user_orders(
+    view: str = Query("full", pattern=ORDER_VIEW_PATTERN),
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Get current user's order history, newest first
+    
+    view=summary returns only id, status, total, item count and the first
+    item's image, for order lists. Pass the X-Next-Cursor header of a
+    response as `cursor` for the next (older) page.
+    """
+    try:
+        filter_query = apply_cursor({"user_id": ObjectId(current_user.id)}, cursor, "created_at", -1)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    # Seeks on the (user_id, created_at, _id) index; one extra order tells whether there is a next page
+    pipeline = [
+        {"$match": filter_query},
+        {"$sort": {"created_at": -1, "_id": -1}},
+        {"$limit": limit + 1}
+    ]
+    if view == "summary":
+        pipeline.append({"$project": ORDER_SUMMARY_PROJECTION})
+    orders = await orders_collection.aggregate(pipeline).to_list(length=limit + 1)
     
-    order_responses = []
-    for order in orders:
-        order_responses.append(OrderResponse(
-            id=str(order["_id"]),
-            user_name=order["user_name"],
-            items=order["items"],
-            total_amount=order["total_amount"],
-            tax_amount=order["tax_amount"],
-            shipping_amount=order["shipping_amount"],
-            status=order["status"],
-            shipping_address=order.get("shipping_address"),
-            payment_method=order["payment_method"],
-            tracking_number=order.get("tracking_number"),
-            created_at=order["created_at"]
-        ))
+    headers = {}
+    if len(orders) > limit:
+        orders = orders[:limit]
+        headers["X-Next-Cursor"] = cursor_for_document("created_at", -1, orders[-1])
     
-    return order_responses
+    if view == "summary":
+        return json_response([order_to_summary(order) for order in orders], headers=headers)
+    return json_response([order_to_dict(order) for order in orders], headers=headers)
 
-@router.get("/watchlist", response_model=List[ProductResponse])
-async def get_user_watchlist(current_user: UserResponse = Depends(get_current_user)):
+@router.get("/watchlist", response_model=List[Union[ProductResponse, ProductCardResponse]])
+async def get_user_watchlist(
+    view: str = Query("full", pattern=VIEW_PATTERN),
+    current_user: UserResponse = Depends(get_current_user)
+):
     """Get current user's watchlist"""
     # Get user's watchlist
     user = await users_collection.find_one({"_id": ObjectId(current_user.id)})
@@ -80,37 +112,11 @@ async def get_user_watchlist(current_user: UserResponse = Depends(get_current_us
     
     # Get products in watchlist
     watchlist_ids = [ObjectId(pid) for pid in user["watchlist"] if ObjectId.is_valid(str(pid))]
-    cursor = products_collection.find({"_id": {"$in": watchlist_ids}, "is_active": True})
+    projection = card_projection() if view == "card" else None
+    cursor = products_collection.find({"_id": {"$in": watchlist_ids}, "is_active": True}, projection)
     products = await cursor.to_list(length=100)
     
-    product_responses = []
-    for product in products:
-        product_responses.append(ProductResponse(
-            id=str(product["_id"]),
-            name=product["name"],
-            description=product["description"],
-            price=product["price"],
-            original_price=product.get("original_price"),
-            images=product["images"],
-            category=product["category"],
-            subcategory=product.get("subcategory"),
-            condition=product["condition"],
-            listing_type=product["listing_type"],
-            seller=str(product["seller"]),
-            seller_name=product["seller_name"],
-            is_auction=product["is_auction"],
-            auction_end_time=product.get("auction_end_time"),
-            current_bid=product.get("current_bid"),
-            bid_count=product["bid_count"],
-            buy_it_now=product["buy_it_now"],
-            quantity=product["quantity"],
-            brand=product.get("brand"),
-            rating=product["rating"],
-            review_count=product["review_count"],
-            created_at=product["created_at"]
-        ))
-    
-    return product_responses
+    return json_response(serialize_products(products, view))
 
 @router.post("/watchlist/{product_id}", response_model=dict)
 async def add_to_watchlist(
@@ -4,6 +4,7 @@ from database import products_collection, users_collection
 from models.user import User
 from models.product import Product
 from passlib.context import CryptContext
+from services.catalog import products_written
 import random
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -295,6 +296,7 @@ async def create_sample_products():
                 seller_name=seller["name"],
                 is_auction=is_auction,
                 auction_end_time=datetime.utcnow() + timedelta(days=random.randint(1, 7)) if is_auction else None,
+                auction_status="open" if is_auction else None,
                 current_bid=item["price"] - random.randint(10, 50) if is_auction else None,
                 bid_count=random.randint(0, 25) if is_auction else 0,
                 buy_it_now=not is_auction,
@@ -308,6 +310,7 @@ async def create_sample_products():
     
     try:
         result = await products_collection.insert_many(products)
+        products_written(products)
         print(f"Created {len(result.inserted_ids)} sample products")
         return result.inserted_ids
     except Exception as e:
@@ -3,6 +3,7 @@ from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
@@ -15,8 +16,21 @@ from routes.auth_routes import router as auth_router
 from routes.product_routes import router as product_router
 from routes.user_routes import router as user_router
 from routes.order_routes import router as order_router
+from routes.cart_routes import router as cart_router
 from database import create_indexes, close_db_connection
 from seed_data import seed_database
+from services.catalog import load_catalog_indexes, run_catalog_sync
+from services.auction_scheduler import auction_scheduler
+from services.bid_engine import bid_engine
+from services.cart import cart_store
+from services.live import broadcaster
+from services.password_hasher import password_hasher
+from services.product_cache import product_cache
+from services.rate_limit import RateLimitMiddleware, rate_limiter
+from services.revocation import revocation_list
+from services.search_index import search_index
+from services.token_cache import token_cache
+from services.user_cache import user_cache
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -62,12 +76,27 @@ async def get_status_checks():
     status_checks = await db.status_checks.find().to_list(1000)
     return [StatusCheck(**status_check) for status_check in status_checks]
 
+@api_router.get("/stats/caches")
+async def get_cache_stats():
+    """Sizes and hit rates of this worker's in-process caches"""
+    return {
+        "token_cache": token_cache.stats(),
+        "user_cache": user_cache.stats(),
+        "product_cache": product_cache.stats(),
+        "search_results": search_index.results.stats(),
+        "rate_limit": rate_limiter.stats()
+    }
+
 # Include all routers
 app.include_router(api_router)
 app.include_router(auth_router)
 app.include_router(product_router)
 app.include_router(user_router)
 app.include_router(order_router)
+app.include_router(cart_router)
+
+# Rate limiting (added before CORS so CORS wraps it and 429s carry CORS headers)
+app.add_middleware(RateLimitMiddleware)
 
 # CORS middleware
 app.add_middleware(
@@ -76,6 +105,7 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "Idempotent-Replayed", "Retry-After"],
 )
 
 # Configure logging
@@ -85,17 +115,35 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Long-running tasks started with the app and cancelled on shutdown
+background_tasks = []
+
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database indexes and seed data"""
+    """Initialize database indexes, seed data, in-memory indexes, auction schedule and revoked tokens"""
     logger.info("Starting up EasyCart API...")
     await create_indexes()
     await seed_database()
+    await load_catalog_indexes()
+    await auction_scheduler.load()
+    await revocation_list.sync()
+    background_tasks.append(asyncio.create_task(run_catalog_sync()))
+    background_tasks.append(asyncio.create_task(broadcaster.run_heartbeats()))
+    background_tasks.append(asyncio.create_task(auction_scheduler.run()))
+    background_tasks.append(asyncio.create_task(cart_store.run()))
+    background_tasks.append(asyncio.create_task(revocation_list.run()))
     logger.info("EasyCart API startup completed!")
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Close database connections"""
+    """Stop background tasks, drain bid writers, flush carts and close database connections"""
     logger.info("Shutting down EasyCart API...")
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    background_tasks.clear()
+    await bid_engine.close()
+    await cart_store.flush()
+    password_hasher.shutdown()
     await close_db_connection()
     logger.info("EasyCart API shutdown completed!")
@@ -0,0 +1,173 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from bson import ObjectId
+from database import products_collection
+from pymongo import ReturnDocument
+from services.bid_engine import AUCTION_CLOSED, AUCTION_OPEN, bid_engine
+from services.live import broadcaster
+import asyncio
+import heapq
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on one sleep, so clock jumps and missed wake-ups heal themselves
+AUCTION_SCHEDULER_MAX_SLEEP_SECONDS = float(os.getenv("AUCTION_SCHEDULER_MAX_SLEEP_SECONDS", "30"))
+# Delay before retrying an auction whose close failed
+AUCTION_CLOSE_RETRY_SECONDS = 5
+# Auctions closed concurrently when many end at once
+AUCTION_CLOSE_CONCURRENCY = int(os.getenv("AUCTION_CLOSE_CONCURRENCY", "20"))
+
+class AuctionScheduler:
+    """Closes auctions at their auction_end_time
+
+    Deadlines sit in a min-heap, and the loop sleeps until the earliest one
+    (or until an earlier deadline is scheduled), so an idle tick costs one
+    peek however many auctions are open. Rescheduled or cancelled auctions
+    leave their old heap entry behind; it is skipped when popped because it
+    no longer matches `deadlines`.
+
+    Closing is a conditional update (status still open, deadline passed), so
+    with several workers running a scheduler exactly one of them records
+    the winner; every worker still ends its own live streams and bid books.
+    """
+
+    def __init__(self, products):
+        self.products = products
+        self.heap: List[Tuple[datetime, ObjectId]] = []
+        self.deadlines: Dict[ObjectId, datetime] = {}
+        self.closed = 0
+        self._wake = asyncio.Event()
+
+    def schedule(self, product_id: ObjectId, end_time: datetime):
+        if self.deadlines.get(product_id) == end_time:
+            return
+        wake = not self.heap or end_time < self.heap[0][0]
+        self.deadlines[product_id] = end_time
+        heapq.heappush(self.heap, (end_time, product_id))
+        if wake:
+            self._wake.set()
+
+    def cancel(self, product_id: ObjectId):
+        self.deadlines.pop(product_id, None)
+
+    def track(self, product: dict):
+        """Schedule, cancel or end from a (possibly projected) product document"""
+        product_id = product["_id"]
+        if (product.get("is_active", True) and product.get("auction_status") == AUCTION_OPEN
+                and product.get("auction_end_time")):
+            self.schedule(product_id, product["auction_end_time"])
+        elif product.get("auction_status") == AUCTION_CLOSED and product_id in self.deadlines:
+            # Another worker closed it before our own deadline fired
+            self.cancel(product_id)
+            self._end(product)
+        else:
+            self.cancel(product_id)
+
+    async def load(self) -> int:
+        """Schedule every open auction; ones that ended while we were down close on the first tick"""
+        # Auctions written before auction_status existed
+        await self.products.update_many(
+            {"is_auction": True, "auction_status": {"$exists": False}},
+            {"$set": {"auction_status": AUCTION_OPEN}}
+        )
+        cursor = self.products.find(
+            {"is_active": True, "auction_status": AUCTION_OPEN},
+            {"auction_end_time": 1, "auction_status": 1, "is_active": 1}
+        )
+        async for product in cursor:
+            self.track(product)
+        logger.info(f"Auction scheduler loaded {len(self.deadlines)} open auctions")
+        return len(self.deadlines)
+
+    def due(self, now: datetime) -> List[ObjectId]:
+        """Pop every auction whose deadline has passed"""
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            end_time, product_id = heapq.heappop(self.heap)
+            if self.deadlines.get(product_id) == end_time:
+                del self.deadlines[product_id]
+                due.append(product_id)
+        return due
+
+    def next_sleep(self, now: datetime) -> float:
+        # Drop stale heads so they don't cause early wake-ups
+        while self.heap and self.deadlines.get(self.heap[0][1]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+        if not self.heap:
+            return AUCTION_SCHEDULER_MAX_SLEEP_SECONDS
+        return min(max((self.heap[0][0] - now).total_seconds(), 0), AUCTION_SCHEDULER_MAX_SLEEP_SECONDS)
+
+    async def close_auction(self, product_id: ObjectId) -> Optional[dict]:
+        """Flip an ended auction to closed and record its winning bid, in one write"""
+        now = datetime.utcnow()
+        # A pipeline update copies last_bid in the same write that closes the auction,
+        # so a closed auction always has its winner
+        product = await self.products.find_one_and_update(
+            {"_id": product_id, "auction_status": AUCTION_OPEN, "auction_end_time": {"$lte": now}},
+            [{"$set": {
+                "auction_status": AUCTION_CLOSED,
+                "winning_bid": {"$ifNull": ["$last_bid", None]},
+                "updated_at": now
+            }}],
+            return_document=ReturnDocument.AFTER
+        )
+        if product is not None:
+            self.closed += 1
+        return product
+
+    async def _close(self, product_id: ObjectId):
+        # Imported here because the catalog imports this module
+        from services.catalog import products_written
+
+        try:
+            product = await self.close_auction(product_id)
+        except Exception as e:
+            logger.error(f"Closing auction {product_id} failed: {e}")
+            self.schedule(product_id, datetime.utcnow() + timedelta(seconds=AUCTION_CLOSE_RETRY_SECONDS))
+            return
+
+        if product is None:
+            # Another worker closed it, or its deadline moved
+            product = await self.products.find_one({"_id": product_id})
+            if product is None:
+                return
+            if product.get("auction_status") != AUCTION_CLOSED:
+                self.track(product)
+                return
+        else:
+            products_written([product])
+        self._end(product)
+
+    def _end(self, product: dict):
+        """Drop a closed auction's bid book and end its live streams on this worker"""
+        product_id = product["_id"]
+        winning_bid = product.get("winning_bid")
+        bid_engine.forget(product_id)
+        broadcaster.publish(product_id, "ended", {
+            "product_id": str(product_id),
+            "winning_bid": {"amount": winning_bid["amount"], "user_name": winning_bid["user_name"]} if winning_bid else None
+        })
+        broadcaster.close_channel(product_id)
+
+    async def run(self):
+        """Background loop closing auctions as their deadlines pass"""
+        semaphore = asyncio.Semaphore(AUCTION_CLOSE_CONCURRENCY)
+
+        async def close(product_id: ObjectId):
+            async with semaphore:
+                await self._close(product_id)
+
+        while True:
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.next_sleep(datetime.utcnow()))
+            except asyncio.TimeoutError:
+                pass
+            due = self.due(datetime.utcnow())
+            if due:
+                await asyncio.gather(*(close(product_id) for product_id in due))
+                logger.info(f"Closed {len(due)} auctions")
+
+auction_scheduler = AuctionScheduler(products_collection)
@@ -0,0 +1,389 @@
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, List, Optional, Tuple
+from bson import ObjectId
+from database import bids_collection, products_collection
+from services.live import broadcaster
+from services.product_cache import invalidate_product
+from services.proxy_bidding import ProxyBook, resolve
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Most recent accepted bids kept in memory per auction
+BID_BOOK_SIZE = int(os.getenv("BID_BOOK_SIZE", "100"))
+# Most queued bids one product's writer decides and persists in a single batch
+BID_BATCH_SIZE = int(os.getenv("BID_BATCH_SIZE", "256"))
+# A product's writer task exits after this long without bids
+BID_WRITER_IDLE_SECONDS = float(os.getenv("BID_WRITER_IDLE_SECONDS", "30"))
+# Times a batch is re-decided after another process moved the auction
+BID_CONFLICT_RETRIES = 3
+
+# Copied onto the product with each accepted batch; becomes winning_bid at close
+LAST_BID_FIELDS = ("_id", "user_id", "user_name", "amount", "is_proxy", "created_at")
+# Spacing between bid records made in one batch, so created_at keeps their order
+RECORD_SPACING = timedelta(milliseconds=1)
+# Values of the products' auction_status field (None for fixed-price listings)
+AUCTION_OPEN = "open"
+AUCTION_CLOSED = "closed"
+
+class AuctionBook:
+    """In-memory state of one auction: current bid and holder, bid count,
+    proxy maxima and recent bids
+
+    Bid records never go down, so `recent` is ordered by amount and by time
+    at once; its right end is the current high bid. It holds one record more
+    than BID_BOOK_SIZE, so whether older records exist is known exactly.
+    """
+
+    def __init__(self, product: dict, bids: List[dict]):
+        self.product_id: ObjectId = product["_id"]
+        self.price: float = product["price"]
+        self.auction_end_time: Optional[datetime] = product.get("auction_end_time")
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.writer: Optional[asyncio.Task] = None
+        self.reset(product, bids)
+
+    def reset(self, product: dict, bids: List[dict]):
+        """Take bid state from a freshly read product and its latest bids"""
+        last_bid = product.get("last_bid")
+        self.current_bid: Optional[float] = product.get("current_bid")
+        self.holder: Optional[str] = str(last_bid["user_id"]) if last_bid else None
+        self.bid_count: int = product.get("bid_count", 0)
+        self.auction_end_time = product.get("auction_end_time")
+        self.proxies = ProxyBook(product.get("proxy_maxima"))
+        self.recent: Deque[dict] = deque(sorted(bids, key=lambda b: b["created_at"]), maxlen=BID_BOOK_SIZE + 1)
+        self.last_record_at: Optional[datetime] = self.recent[-1]["created_at"] if self.recent else None
+
+    @property
+    def floor(self) -> float:
+        """Amount the next bid has to beat"""
+        return self.current_bid if self.current_bid is not None else self.price
+
+    def is_closed(self, now: datetime) -> bool:
+        return self.auction_end_time is not None and self.auction_end_time < now
+
+    def snapshot(self) -> dict:
+        """Auction state as sent to live subscribers"""
+        return {
+            "product_id": str(self.product_id),
+            "current_bid": self.current_bid,
+            "bid_count": self.bid_count,
+            "auction_end_time": self.auction_end_time
+        }
+
+    def latest(self) -> List[dict]:
+        """Newest BID_BOOK_SIZE bid records, newest first"""
+        return list(reversed(self.recent))[:BID_BOOK_SIZE]
+
+    @property
+    def complete(self) -> bool:
+        """Whether `recent` holds every bid record the auction has"""
+        return len(self.recent) <= BID_BOOK_SIZE
+
+class BidEngine:
+    """Per-auction bid books with a single writer per product
+
+    Bids for one product go through that product's queue and are decided by
+    its writer task against the in-memory book, so products never contend
+    with each other. The writer takes everything queued as one batch: one
+    insert_many records every bid made, one conditional update (guarded on
+    the bid_count the book expects) moves the product to the batch's final
+    bid and stores changed proxy maxima, and only then are the bidders
+    answered. If another process moved the auction in the meantime the
+    batch's records are deleted, the book is reloaded and the batch decided
+    again.
+    """
+
+    def __init__(self, products, bids):
+        self.products = products
+        self.bids = bids
+        self.books: Dict[ObjectId, AuctionBook] = {}
+        self._loading: Dict[ObjectId, asyncio.Future] = {}
+        self.batches = 0
+        self.conflicts = 0
+
+    async def _read(self, product_id: ObjectId) -> Optional[Tuple[dict, List[dict]]]:
+        """An open auction's product document and latest bids"""
+        product = await self.products.find_one({"_id": product_id, "is_active": True})
+        if not product or not product.get("is_auction") or product.get("auction_status") == AUCTION_CLOSED:
+            return None
+        cursor = self.bids.find({"product_id": product_id}).sort([("created_at", -1), ("_id", -1)]).limit(BID_BOOK_SIZE + 1)
+        return product, await cursor.to_list(length=BID_BOOK_SIZE + 1)
+
+    async def _read_book(self, product_id: ObjectId) -> Optional[AuctionBook]:
+        fresh = await self._read(product_id)
+        return AuctionBook(*fresh) if fresh else None
+
+    async def get_book(self, product_id: ObjectId) -> Optional[AuctionBook]:
+        """Book for an active, not yet closed auction, loading it on first use"""
+        book = self.books.get(product_id)
+        if book is not None:
+            return book
+        # Concurrent first bids share one load
+        loading = self._loading.get(product_id)
+        if loading is not None:
+            return await loading
+        loading = self._loading[product_id] = asyncio.get_running_loop().create_future()
+        try:
+            book = await self._read_book(product_id)
+            if book is not None:
+                self.books[product_id] = book
+            loading.set_result(book)
+            return book
+        except Exception as e:
+            loading.set_exception(e)
+            raise
+        finally:
+            del self._loading[product_id]
+
+    def forget(self, product_id: ObjectId):
+        """Drop a book (auction closed or deactivated); its writer finishes what is queued"""
+        self.books.pop(product_id, None)
+
+    async def submit(self, bid: dict, proxy: bool = False) -> dict:
+        """Queue a bid document and wait for the product's writer to accept it
+
+        With `proxy`, the amount is the bidder's secret maximum: the engine
+        bids for them, one increment at a time, only as far as competing
+        bids require. Raises LookupError if the product is not an active
+        listing and ValueError with the reason if the bid is rejected.
+        """
+        book = await self.get_book(bid["product_id"])
+        if book is None:
+            product = await self.products.find_one({"_id": bid["product_id"], "is_active": True}, {"is_auction": 1})
+            if not product:
+                raise LookupError("Product not found")
+            if not product.get("is_auction"):
+                raise ValueError("This item is not an auction")
+            raise ValueError("This auction has ended")
+
+        future = asyncio.get_running_loop().create_future()
+        book.queue.put_nowait((bid, proxy, future))
+        if book.writer is None or book.writer.done():
+            book.writer = asyncio.create_task(self._write(book))
+        return await future
+
+    async def _write(self, book: AuctionBook):
+        """Single writer for one product: decide and persist queued bids in batches"""
+        while True:
+            try:
+                first = await asyncio.wait_for(book.queue.get(), BID_WRITER_IDLE_SECONDS)
+            except asyncio.TimeoutError:
+                if book.queue.empty():
+                    book.writer = None
+                    return
+                continue
+            batch = [first]
+            while len(batch) < BID_BATCH_SIZE and not book.queue.empty():
+                batch.append(book.queue.get_nowait())
+            try:
+                await self._apply(book, batch)
+            except Exception as e:
+                logger.error(f"Bid batch for {book.product_id} failed: {e}")
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            finally:
+                for _ in batch:
+                    book.queue.task_done()
+
+    def _record_for(self, book: AuctionBook, bid: dict) -> dict:
+        """Stamp a bid record so records keep their decision order in created_at"""
+        # Mongo stores milliseconds, so order has to hold at that precision
+        created_at = bid["created_at"]
+        bid["created_at"] = created_at.replace(microsecond=created_at.microsecond // 1000 * 1000)
+        if book.last_record_at is not None and bid["created_at"] <= book.last_record_at:
+            bid["created_at"] = book.last_record_at + RECORD_SPACING
+        book.last_record_at = bid["created_at"]
+        return bid
+
+    def _proxy_record(self, book: AuctionBook, user_id: str, amount: float) -> dict:
+        return self._record_for(book, {
+            "_id": ObjectId(),
+            "product_id": book.product_id,
+            "user_id": ObjectId(user_id),
+            "user_name": book.proxies.maxima[user_id]["user_name"],
+            "amount": amount,
+            "is_proxy": True,
+            "created_at": datetime.utcnow()
+        })
+
+    def _decide(self, book: AuctionBook, batch: list) -> Tuple[List[dict], Dict[str, dict], list]:
+        """Decide a batch in arrival order, updating the book in place
+
+        Returns the bid records to insert, the proxy maxima to store and
+        the (future, result) answers to send once both are persisted.
+        """
+        records, maxima, answers = [], {}, []
+        for bid, proxy, future in batch:
+            if future.done():
+                continue
+            user_id = str(bid["user_id"])
+            entry = book.proxies.maxima.get(user_id)
+            if book.is_closed(bid["created_at"]):
+                future.set_exception(ValueError("This auction has ended"))
+                continue
+            if bid["amount"] <= book.floor:
+                label = "Maximum bid" if proxy else "Bid amount"
+                future.set_exception(ValueError(f"{label} must be higher than current bid of ${book.floor}"))
+                continue
+            if proxy and entry and bid["amount"] <= entry["max"]:
+                future.set_exception(ValueError(f"Maximum bid must be higher than your current maximum of ${entry['max']}"))
+                continue
+
+            # Every bid is also its bidder's maximum, so proxies can answer it
+            if not entry or bid["amount"] > entry["max"]:
+                maxima[user_id] = {"max": bid["amount"], "user_name": bid["user_name"], "created_at": bid["created_at"]}
+                book.proxies.set(user_id, maxima[user_id])
+            if not proxy:
+                records.append(self._record_for(book, bid))
+                book.current_bid, book.holder = bid["amount"], user_id
+            for holder, amount in resolve(book.proxies, book.floor, book.holder):
+                records.append(self._proxy_record(book, holder, amount))
+                book.current_bid, book.holder = amount, holder
+
+            answer = {"current_bid": book.current_bid, "is_leading": book.holder == user_id}
+            answer["max_bid" if proxy else "bid_amount"] = bid["amount"]
+            answers.append((future, answer))
+        return records, maxima, answers
+
+    async def _apply(self, book: AuctionBook, batch: list):
+        for _ in range(BID_CONFLICT_RETRIES):
+            base = (book.current_bid, book.holder, book.last_record_at)
+            undo = {user_id: book.proxies.maxima.get(user_id) for bid, _, _ in batch for user_id in [str(bid["user_id"])]}
+            records, maxima, answers = self._decide(book, batch)
+            if not answers:
+                return
+
+            update = {"$set": {f"proxy_maxima.{user_id}": entry for user_id, entry in maxima.items()}}
+            if records:
+                update["$set"].update({
+                    "current_bid": book.current_bid,
+                    "last_bid": {field: records[-1].get(field, False) for field in LAST_BID_FIELDS}
+                })
+                update["$inc"] = {"bid_count": len(records)}
+            # Records go in first, so a reader never sees a bid_count whose bids aren't written yet
+            try:
+                if records:
+                    await self._record(records)
+                result = await self.products.update_one(
+                    {
+                        "_id": book.product_id,
+                        "is_active": True,
+                        "auction_status": {"$ne": AUCTION_CLOSED},
+                        "bid_count": book.bid_count,
+                        "$or": [{"auction_end_time": None}, {"auction_end_time": {"$gte": min(b["created_at"] for b, _, _ in batch)}}]
+                    },
+                    update
+                )
+                modified = result.modified_count
+            except Exception as e:
+                # The update may have landed before the error; never fail a persisted batch
+                if not records or not await self._landed(book, records):
+                    await self._discard(records)
+                    self._undo(book, base, undo)
+                    raise
+                logger.warning(f"Bid batch for {book.product_id} persisted despite error: {e}")
+                modified = 1
+            self.batches += 1
+            if modified:
+                invalidate_product(book.product_id)
+                book.bid_count += len(records)
+                book.recent.extend(records)
+                first_count = book.bid_count - len(records)
+                for future, answer in answers:
+                    future.set_result(answer)
+                broadcaster.publish_many(book.product_id, "bid", [
+                    {
+                        "amount": record["amount"],
+                        "user_name": record["user_name"],
+                        "is_proxy": record.get("is_proxy", False),
+                        "created_at": record["created_at"],
+                        "current_bid": record["amount"],
+                        "bid_count": first_count + position
+                    }
+                    for position, record in enumerate(records, 1)
+                ])
+                return
+
+            # Another process bid, or the auction closed: re-read and decide again
+            self.conflicts += 1
+            await self._discard(records)
+            self._undo(book, base, undo)
+            fresh = await self._read(book.product_id)
+            if fresh is None:
+                self.forget(book.product_id)
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(LookupError("Product not found"))
+                return
+            # The queue and writer stay with the live book object
+            book.reset(*fresh)
+            broadcaster.publish(book.product_id, "snapshot", book.snapshot())
+
+        for _, _, future in batch:
+            if not future.done():
+                future.set_exception(ValueError("Auction is busy, please retry"))
+
+    def _undo(self, book: AuctionBook, base: tuple, undo: Dict[str, Optional[dict]]):
+        """Put the book back as it was before an unpersisted batch"""
+        book.current_bid, book.holder, book.last_record_at = base
+        for user_id, previous in undo.items():
+            if book.proxies.maxima.get(user_id) is not previous:
+                book.proxies.restore(user_id, previous)
+
+    async def _record(self, bids: List[dict]):
+        """Insert bid history records; ids are fixed, so a retried batch can't duplicate them"""
+        try:
+            await self.bids.insert_many(bids, ordered=False)
+        except BulkWriteError as e:
+            if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+        except DuplicateKeyError:
+            pass
+
+    async def _discard(self, bids: List[dict]):
+        """Delete the records of a batch the product update did not take"""
+        if not bids:
+            return
+        try:
+            await self.bids.delete_many({"_id": {"$in": [bid["_id"] for bid in bids]}})
+        except Exception as e:
+            logger.error(f"Could not discard {len(bids)} unaccepted bid records for {bids[0]['product_id']}: {e}")
+
+    async def _landed(self, book: AuctionBook, records: List[dict]) -> bool:
+        """Whether the product already carries this batch's last bid"""
+        try:
+            product = await self.products.find_one({"_id": book.product_id}, {"last_bid._id": 1})
+        except Exception:
+            return False
+        return bool(product) and (product.get("last_bid") or {}).get("_id") == records[-1]["_id"]
+
+    def in_step(self, product_id: ObjectId, bid_count: Optional[int]) -> Optional[AuctionBook]:
+        """The product's book if it is in step with the given bid_count"""
+        book = self.books.get(product_id)
+        if book is None or book.bid_count != bid_count:
+            return None
+        return book
+
+    async def close(self, timeout: float = 5):
+        """Let writers finish queued bids, then stop them"""
+        writers = [book.writer for book in self.books.values() if book.writer and not book.writer.done()]
+        for book in self.books.values():
+            if book.writer and not book.writer.done():
+                try:
+                    await asyncio.wait_for(book.queue.join(), timeout)
+                except asyncio.TimeoutError:
+                    logger.warning(f"Bid writer for {book.product_id} did not drain before shutdown")
+        for writer in writers:
+            writer.cancel()
+        await asyncio.gather(*writers, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {"books": len(self.books), "batches": self.batches, "conflicts": self.conflicts}
+
+bid_engine = BidEngine(products_collection, bids_collection)
@@ -0,0 +1,69 @@
+from typing import List, Optional, Tuple
+from bson import ObjectId
+from database import bids_collection
+from services.bid_engine import BID_BOOK_SIZE, bid_engine
+from services.cache import TTLCache
+from services.pagination import apply_cursor, cursor_for_document
+import os
+
+BID_HISTORY_CACHE_TTL_SECONDS = float(os.getenv("BID_HISTORY_CACHE_TTL_SECONDS", "300"))
+BID_HISTORY_CACHE_MAX_ENTRIES = int(os.getenv("BID_HISTORY_CACHE_MAX_ENTRIES", "2000"))
+
+HISTORY_SORT = [("created_at", -1), ("_id", -1)]
+
+# product_id -> (bid_count, newest BID_BOOK_SIZE records, whether that is all of them),
+# for products without a live bid book (closed auctions, books on other workers)
+bid_history_cache = TTLCache(BID_HISTORY_CACHE_MAX_ENTRIES, BID_HISTORY_CACHE_TTL_SECONDS)
+
+def bid_to_dict(bid: dict) -> dict:
+    """Map a bids document to the GET /bids shape"""
+    return {
+        "user_name": bid["user_name"],
+        "amount": bid["amount"],
+        "is_proxy": bid.get("is_proxy", False),
+        "created_at": bid["created_at"]
+    }
+
+async def _latest(product_id: ObjectId, bid_count: Optional[int], last_bid_id: Optional[ObjectId]) -> Tuple[List[dict], bool]:
+    """Newest bid records and whether they are complete, without a sort when possible"""
+    book = bid_engine.in_step(product_id, bid_count)
+    if book is not None:
+        return book.latest(), book.complete
+
+    cached = bid_history_cache.get(product_id)
+    if cached is not None and cached[0] == bid_count:
+        return cached[1], cached[2]
+
+    cursor = bids_collection.find({"product_id": product_id}).sort(HISTORY_SORT).limit(BID_BOOK_SIZE + 1)
+    records = await cursor.to_list(length=BID_BOOK_SIZE + 1)
+    latest, complete = records[:BID_BOOK_SIZE], len(records) <= BID_BOOK_SIZE
+    # Only cache what the product version describes: the newest record has to be its last_bid
+    if last_bid_id is None or (latest and latest[0]["_id"] == last_bid_id):
+        bid_history_cache.set(product_id, (bid_count, latest, complete))
+    return latest, complete
+
+async def get_bid_history(
+    product_id: ObjectId,
+    bid_count: Optional[int],
+    limit: int,
+    cursor: Optional[str] = None,
+    last_bid_id: Optional[ObjectId] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """One page of bid history, newest first, and the cursor of the next page
+
+    The first page comes from the bid engine's book or the history cache
+    while they match the product's bid_count; later pages seek on the
+    (product_id, created_at, _id) index. Raises ValueError for a bad cursor.
+    """
+    if cursor is None and limit <= BID_BOOK_SIZE:
+        latest, complete = await _latest(product_id, bid_count, last_bid_id)
+        page = latest[:limit]
+        has_next = len(latest) > limit or not complete
+    else:
+        filter_query = apply_cursor({"product_id": product_id}, cursor, "created_at", -1)
+        records = await bids_collection.find(filter_query).sort(HISTORY_SORT).limit(limit + 1).to_list(length=limit + 1)
+        page = records[:limit]
+        has_next = len(records) > limit
+
+    next_cursor = cursor_for_document("created_at", -1, page[-1]) if has_next and page else None
+    return [bid_to_dict(bid) for bid in page], next_cursor
@@ -0,0 +1,209 @@
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Set
+from bson import ObjectId
+from database import carts_collection, products_collection
+from pymongo import UpdateOne
+from services.stock import load_order_products
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Carts kept in memory; clean ones are evicted least recently used first
+CART_CACHE_MAX_ENTRIES = int(os.getenv("CART_CACHE_MAX_ENTRIES", "50000"))
+# An untouched cart is re-read from the database after this long
+CART_IDLE_SECONDS = float(os.getenv("CART_IDLE_SECONDS", "600"))
+# How often changed carts are written back, and how many go in one bulk_write
+CART_FLUSH_INTERVAL_SECONDS = float(os.getenv("CART_FLUSH_INTERVAL_SECONDS", "1"))
+CART_FLUSH_BATCH_SIZE = int(os.getenv("CART_FLUSH_BATCH_SIZE", "500"))
+# Distinct products one cart may hold
+CART_MAX_ITEMS = int(os.getenv("CART_MAX_ITEMS", "100"))
+
+class Cart:
+    """One user's cart: product id -> quantity, in the order items were added"""
+
+    __slots__ = ("items", "updated_at", "touched")
+
+    def __init__(self, items: Dict[ObjectId, int], updated_at: Optional[datetime]):
+        self.items = items
+        self.updated_at = updated_at
+        self.touched = time.monotonic()
+
+class CartStore:
+    """Per-user carts held in memory with write-behind persistence
+
+    Reads and edits only touch the in-memory cart; an edit marks the cart
+    dirty and the flush loop writes every dirty cart in one bulk_write per
+    interval, so a burst of edits costs one write. Pricing happens when a
+    cart is shown or checked out, with one $in lookup for all its products.
+
+    A user's requests are expected to reach the worker holding their cart
+    (one worker, or sticky routing); a cart idle for CART_IDLE_SECONDS is
+    re-read, which bounds how stale another worker's copy can get.
+    """
+
+    def __init__(self, carts, products):
+        self.carts_collection = carts
+        self.products = products
+        self.carts: "OrderedDict[ObjectId, Cart]" = OrderedDict()
+        self.dirty: Set[ObjectId] = set()
+        self.loading: Dict[ObjectId, asyncio.Future] = {}
+        self.flushes = 0
+        self.flushed = 0
+
+    async def get(self, user_id: ObjectId) -> Cart:
+        cart = self.carts.get(user_id)
+        if cart is not None and (user_id in self.dirty or time.monotonic() - cart.touched < CART_IDLE_SECONDS):
+            cart.touched = time.monotonic()
+            self.carts.move_to_end(user_id)
+            return cart
+
+        # Concurrent misses for one user share a single read
+        future = self.loading.get(user_id)
+        if future is not None:
+            return await asyncio.shield(future)
+        future = asyncio.get_running_loop().create_future()
+        self.loading[user_id] = future
+        try:
+            cart = await self._load(user_id)
+            future.set_result(cart)
+            return cart
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            del self.loading[user_id]
+
+    async def _load(self, user_id: ObjectId) -> Cart:
+        document = await self.carts_collection.find_one({"_id": user_id})
+        if document is None:
+            cart = Cart({}, None)
+        else:
+            cart = Cart({item["product_id"]: item["quantity"] for item in document["items"]}, document.get("updated_at"))
+        self.carts[user_id] = cart
+        self._evict()
+        return cart
+
+    def _evict(self):
+        excess = len(self.carts) - CART_CACHE_MAX_ENTRIES
+        if excess <= 0:
+            return
+        # Oldest first; dirty carts stay until they are flushed
+        for user_id in [user_id for user_id in self.carts if user_id not in self.dirty][:excess]:
+            del self.carts[user_id]
+
+    def _changed(self, user_id: ObjectId, cart: Cart):
+        cart.updated_at = datetime.utcnow()
+        self.dirty.add(user_id)
+
+    async def add(self, user_id: ObjectId, product_id: ObjectId, quantity: int) -> Cart:
+        """Add quantity of a product; raises ValueError when the cart is full"""
+        cart = await self.get(user_id)
+        if product_id not in cart.items and len(cart.items) >= CART_MAX_ITEMS:
+            raise ValueError(f"A cart can hold at most {CART_MAX_ITEMS} different products")
+        cart.items[product_id] = cart.items.get(product_id, 0) + quantity
+        self._changed(user_id, cart)
+        return cart
+
+    async def set_quantity(self, user_id: ObjectId, product_id: ObjectId, quantity: int) -> Cart:
+        """Set an item's quantity (0 removes it); raises LookupError when it isn't in the cart"""
+        cart = await self.get(user_id)
+        if product_id not in cart.items:
+            raise LookupError("Product not in cart")
+        if quantity:
+            cart.items[product_id] = quantity
+        else:
+            del cart.items[product_id]
+        self._changed(user_id, cart)
+        return cart
+
+    async def remove(self, user_id: ObjectId, product_id: ObjectId) -> Cart:
+        cart = await self.get(user_id)
+        if cart.items.pop(product_id, None) is not None:
+            self._changed(user_id, cart)
+        return cart
+
+    async def take(self, user_id: ObjectId, quantities: Dict[ObjectId, int]) -> Cart:
+        """Remove what an order bought, keeping anything added since"""
+        cart = await self.get(user_id)
+        for product_id, quantity in quantities.items():
+            left = cart.items.get(product_id, 0) - quantity
+            if left > 0:
+                cart.items[product_id] = left
+            else:
+                cart.items.pop(product_id, None)
+        self._changed(user_id, cart)
+        return cart
+
+    async def price(self, cart: Cart) -> dict:
+        """Cart with current names, prices and availability (one product query)"""
+        products = await load_order_products(self.products, list(cart.items)) if cart.items else {}
+        items, subtotal = [], 0
+        for product_id, quantity in cart.items.items():
+            product = products.get(product_id)
+            available = bool(product) and not product["is_auction"] and product["quantity"] >= quantity
+            items.append({
+                "product_id": str(product_id),
+                "name": product["name"] if product else None,
+                "price": product["price"] if product else None,
+                "quantity": quantity,
+                "image": product["images"][0] if product and product["images"] else "",
+                "available": available
+            })
+            if available:
+                subtotal += product["price"] * quantity
+        return {
+            "items": items,
+            "item_count": sum(cart.items.values()),
+            "subtotal": round(subtotal, 2),
+            "updated_at": cart.updated_at
+        }
+
+    async def flush(self):
+        """Write every dirty cart back, CART_FLUSH_BATCH_SIZE per bulk_write"""
+        while self.dirty:
+            batch = []
+            while self.dirty and len(batch) < CART_FLUSH_BATCH_SIZE:
+                batch.append(self.dirty.pop())
+            operations = []
+            for user_id in batch:
+                cart = self.carts[user_id]
+                operations.append(UpdateOne(
+                    {"_id": user_id},
+                    {"$set": {
+                        "items": [{"product_id": product_id, "quantity": quantity} for product_id, quantity in cart.items.items()],
+                        "updated_at": cart.updated_at
+                    }},
+                    upsert=True
+                ))
+            try:
+                await self.carts_collection.bulk_write(operations, ordered=False)
+            except Exception:
+                self.dirty.update(batch)
+                raise
+            self.flushes += 1
+            self.flushed += len(batch)
+        self._evict()
+
+    async def run(self):
+        """Background loop writing changed carts back"""
+        while True:
+            await asyncio.sleep(CART_FLUSH_INTERVAL_SECONDS)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Cart flush failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "carts": len(self.carts),
+            "dirty": len(self.dirty),
+            "flushes": self.flushes,
+            "flushed": self.flushed
+        }
+
+cart_store = CartStore(carts_collection, products_collection)
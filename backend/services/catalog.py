@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+from bson import ObjectId
+from database import products_collection
+from services.auction_scheduler import auction_scheduler
+from services.facets import invalidate_facets
+from services.product_cache import invalidate_product
+from services.search_index import SEARCH_FIELDS, search_index
+from services.suggest_index import suggest_index
+from services.totals import invalidate_counts
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+CATALOG_SYNC_INTERVAL_SECONDS = float(os.getenv("CATALOG_SYNC_INTERVAL_SECONDS", "5"))
+# Each sync re-reads this far behind its watermark, so a write that commits late
+# with an earlier updated_at (or under another worker's clock) is still picked up
+CATALOG_SYNC_OVERLAP = timedelta(seconds=30)
+
+# Only what the in-memory indexes need, not whole documents
+INDEX_PROJECTION = {field: 1 for field in SEARCH_FIELDS}
+INDEX_PROJECTION.update({
+    "is_active": 1, "updated_at": 1, "review_count": 1, "bid_count": 1,
+    "auction_status": 1, "auction_end_time": 1,
+    # For the ended event when another worker closed a tracked auction
+    "winning_bid.amount": 1, "winning_bid.user_name": 1
+})
+
+# Newest updated_at applied so far, and the updated_at applied per product inside the overlap window
+_last_synced: Optional[datetime] = None
+_recently_synced: Dict[ObjectId, datetime] = {}
+
+def _index(product: dict):
+    search_index.upsert(product)
+    suggest_index.upsert(product)
+    auction_scheduler.track(product)
+
+def products_written(products: Iterable[dict]):
+    """Tell in-process caches and indexes that these product documents changed
+
+    Any code that inserts, updates or deactivates products should call this
+    with the written documents (and bump their updated_at, which is how other
+    workers pick the change up).
+    """
+    invalidate_counts()
+    invalidate_facets()
+    for product in products:
+        invalidate_product(product["_id"])
+        _index(product)
+
+def _advance(products: Iterable[dict]):
+    """Move the sync watermark past the given documents and remember them while inside the overlap"""
+    global _last_synced
+    for product in products:
+        updated_at = product.get("updated_at")
+        if updated_at is None:
+            continue
+        if _last_synced is None or updated_at > _last_synced:
+            _last_synced = updated_at
+        _recently_synced[product["_id"]] = updated_at
+
+def _forget_synced():
+    """Drop remembered versions that have fallen out of the overlap window"""
+    if _last_synced is None:
+        return
+    horizon = _last_synced - CATALOG_SYNC_OVERLAP
+    for product_id in [product_id for product_id, updated_at in _recently_synced.items() if updated_at < horizon]:
+        del _recently_synced[product_id]
+
+async def load_catalog_indexes():
+    """Build the in-memory search and suggestion indexes from the products collection"""
+    cursor = products_collection.find({"is_active": True}, INDEX_PROJECTION).sort("updated_at", 1)
+    count = 0
+    async for product in cursor:
+        _index(product)
+        _advance([product])
+        count += 1
+    _forget_synced()
+    logger.info(f"Search and suggestion indexes loaded with {count} products")
+
+async def sync_catalog_changes() -> int:
+    """Apply products changed since the last sync (including by other workers)"""
+    query = {} if _last_synced is None else {"updated_at": {"$gte": _last_synced - CATALOG_SYNC_OVERLAP}}
+    cursor = products_collection.find(query, INDEX_PROJECTION).sort("updated_at", 1)
+    # The overlap re-reads recent writes; skip the versions already applied
+    changed = [
+        product async for product in cursor
+        if _recently_synced.get(product["_id"]) != product.get("updated_at")
+    ]
+    if changed:
+        products_written(changed)
+        _advance(changed)
+    _forget_synced()
+    return len(changed)
+
+async def run_catalog_sync(interval: float = CATALOG_SYNC_INTERVAL_SECONDS):
+    """Background loop keeping the indexes in step with the collection"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            changed = await sync_catalog_changes()
+            if changed:
+                logger.info(f"Catalog sync applied {changed} product changes")
+        except Exception as e:
+            logger.error(f"Catalog sync failed: {e}")
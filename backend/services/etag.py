@@ -0,0 +1,40 @@
+from typing import Any, Optional
+from fastapi import Request, Response
+import hashlib
+import orjson
+
+# Product fields any write can change without touching updated_at (bids and
+# orders only $set/$inc these); together they version the product document
+PRODUCT_VERSION_FIELDS = ("updated_at", "bid_count", "current_bid", "quantity", "is_active")
+PRODUCT_VERSION_PROJECTION = {field: 1 for field in PRODUCT_VERSION_FIELDS}
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag from version parts (ids, timestamps, counters)"""
+    digest = hashlib.blake2b(orjson.dumps(parts, default=str), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+def content_etag(content: Any) -> str:
+    """Strong ETag from the JSON content itself, for data with no version field"""
+    return make_etag(content)
+
+def product_version(product: dict) -> tuple:
+    """Version parts of a product document (full or version-projected)"""
+    return (str(product["_id"]),) + tuple(product.get(field) for field in PRODUCT_VERSION_FIELDS)
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 asks for GET)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 carrying the current validator"""
+    return Response(status_code=304, headers=etag_headers(etag))
+
+def etag_headers(etag: Optional[str]) -> dict:
+    # no-cache: clients may store the body but must revalidate before reuse
+    return {"ETag": etag, "Cache-Control": "no-cache"} if etag else {}
@@ -0,0 +1,90 @@
+from typing import List, Tuple
+from services.cache import TTLCache
+from services.etag import content_etag
+from services.totals import filter_key
+import os
+
+FACET_CACHE_TTL_SECONDS = float(os.getenv("FACET_CACHE_TTL_SECONDS", "60"))
+FACET_CACHE_MAX_ENTRIES = int(os.getenv("FACET_CACHE_MAX_ENTRIES", "512"))
+PRICE_HISTOGRAM_BUCKETS = int(os.getenv("PRICE_HISTOGRAM_BUCKETS", "8"))
+
+# Response key -> product field for the value-count facets
+FACET_FIELDS = {
+    "categories": "category",
+    "brands": "brand",
+    "conditions": "condition",
+    "listing_types": "listing_type"
+}
+FILTERABLE_FIELDS = set(FACET_FIELDS.values()) | {"price"}
+
+facet_cache = TTLCache(FACET_CACHE_MAX_ENTRIES, FACET_CACHE_TTL_SECONDS)
+# facet_cache key for the category list (facet keys are JSON objects)
+CATEGORIES_KEY = "categories"
+
+def invalidate_facets():
+    """Drop cached facets; call after any write that adds, removes or re-filters products"""
+    facet_cache.clear()
+
+def _other_filters(filter_query: dict, field: str) -> dict:
+    """Sidebar filters except the one on `field`, so a facet still lists its alternatives"""
+    return {k: v for k, v in filter_query.items() if k in FILTERABLE_FIELDS and k != field}
+
+def _facet_pipeline(filter_query: dict) -> list:
+    """Single $facet aggregation covering every sidebar facet and the price histogram"""
+    base_match = {k: v for k, v in filter_query.items() if k not in FILTERABLE_FIELDS}
+
+    facets = {
+        "total": [
+            {"$match": _other_filters(filter_query, None)},
+            {"$count": "count"}
+        ],
+        "price_histogram": [
+            {"$match": _other_filters(filter_query, "price")},
+            {"$bucketAuto": {"groupBy": "$price", "buckets": PRICE_HISTOGRAM_BUCKETS}}
+        ]
+    }
+    for key, field in FACET_FIELDS.items():
+        facets[key] = [
+            {"$match": {**_other_filters(filter_query, field), field: {"$ne": None}}},
+            {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1, "_id": 1}}
+        ]
+
+    # $text must stay in the first $match, so it goes in base_match
+    return [{"$match": base_match}, {"$facet": facets}]
+
+async def get_product_facets(collection, filter_query: dict) -> dict:
+    """Counts per facet value plus a price histogram for a listing filter"""
+    key = filter_key(filter_query)
+    cached = facet_cache.get(key)
+    if cached is not None:
+        return cached
+
+    results = await collection.aggregate(_facet_pipeline(filter_query)).to_list(length=1)
+    result = results[0] if results else {}
+
+    total = result.get("total")
+    facets = {"total_count": total[0]["count"] if total else 0}
+    for key_name in FACET_FIELDS:
+        facets[key_name] = [
+            {"value": bucket["_id"], "count": bucket["count"]}
+            for bucket in result.get(key_name, [])
+        ]
+    facets["price_histogram"] = [
+        {"min": bucket["_id"]["min"], "max": bucket["_id"]["max"], "count": bucket["count"]}
+        for bucket in result.get("price_histogram", [])
+    ]
+
+    facet_cache.set(key, facets)
+    return facets
+
+async def load_categories(collection) -> Tuple[List[str], str]:
+    """Distinct product categories and their content ETag, cached with the facets"""
+    cached = facet_cache.get(CATEGORIES_KEY)
+    if cached is not None:
+        return cached
+
+    categories = await collection.distinct("category")
+    cached = (categories, content_etag(categories))
+    facet_cache.set(CATEGORIES_KEY, cached)
+    return cached
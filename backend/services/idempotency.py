@@ -0,0 +1,183 @@
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from fastapi import HTTPException, Response, status
+from database import idempotency_collection
+from services.cache import TTLCache
+from services.serializer import json_response
+from pymongo.errors import DuplicateKeyError
+import asyncio
+import hashlib
+import orjson
+import os
+import time
+
+# Completed responses kept in process, so retries skip the database
+IDEMPOTENCY_CACHE_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_CACHE_TTL_SECONDS", "300"))
+IDEMPOTENCY_CACHE_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_CACHE_MAX_ENTRIES", "10000"))
+# How long a retry waits for the original request (on another worker) to finish
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+# A claim still pending after this long belongs to a request that died; it can be taken over
+IDEMPOTENCY_LEASE_SECONDS = float(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "60"))
+IDEMPOTENCY_POLL_SECONDS = 0.05
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+PENDING = "pending"
+DONE = "done"
+
+def request_fingerprint(*parts: Any) -> str:
+    """Hash of what a request asks for, to catch a key reused for a different request"""
+    return hashlib.blake2b(orjson.dumps(parts, default=str), digest_size=16).hexdigest()
+
+class Idempotency:
+    """Runs a request at most once per Idempotency-Key
+
+    A key is claimed by inserting a pending record into a TTL-indexed
+    collection; the response (including 4xx errors) then replaces it and is
+    replayed to every retry. Duplicates arriving while the original is still
+    running wait for its result: on the same worker through a shared future,
+    on other workers by polling the record. Unexpected errors release the
+    claim, so the client can retry for real.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.cache = TTLCache(IDEMPOTENCY_CACHE_MAX_ENTRIES, IDEMPOTENCY_CACHE_TTL_SECONDS)
+        self.in_flight: Dict[str, asyncio.Future] = {}
+        self.executed = 0
+        self.replayed = 0
+
+    async def run(
+        self,
+        key: Optional[str],
+        scope: str,
+        fingerprint: str,
+        handler: Callable[[], Awaitable[Any]]
+    ) -> Response:
+        """Response of handler() (JSON content), executed once per (scope, key)"""
+        if key is None:
+            return json_response(await handler())
+        if not key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Idempotency-Key must be 1-{IDEMPOTENCY_KEY_MAX_LENGTH} characters"
+            )
+        record_id = f"{scope}:{key}"
+
+        record = self.cache.get(record_id)
+        if record is not None:
+            return self._replay(record, fingerprint)
+
+        future = self.in_flight.get(record_id)
+        if future is not None:
+            record = await asyncio.shield(future)
+            return self._replay(record, fingerprint)
+
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[record_id] = future
+        try:
+            record, replayed = await self._execute(record_id, fingerprint, handler)
+            future.set_result(record)
+        except BaseException as e:
+            future.set_exception(e)
+            # Retrieved here so a future nobody waited on doesn't log a warning
+            future.exception()
+            raise
+        finally:
+            del self.in_flight[record_id]
+        return self._replay(record, fingerprint) if replayed else self._respond(record)
+
+    async def _claim(self, record_id: str, fingerprint: str) -> Optional[dict]:
+        """Claim a key; returns None once claimed, else the record holding it"""
+        now = datetime.utcnow()
+        try:
+            await self.collection.insert_one({"_id": record_id, "fingerprint": fingerprint, "status": PENDING, "created_at": now})
+            return None
+        except DuplicateKeyError:
+            pass
+        stale = await self.collection.find_one_and_update(
+            {"_id": record_id, "status": PENDING, "created_at": {"$lt": now - timedelta(seconds=IDEMPOTENCY_LEASE_SECONDS)}},
+            {"$set": {"fingerprint": fingerprint, "created_at": now}}
+        )
+        if stale is not None:
+            return None
+        # Gone again (expired or released) means free to claim on the next try
+        return await self.collection.find_one({"_id": record_id}) or {"status": None}
+
+    async def _execute(
+        self,
+        record_id: str,
+        fingerprint: str,
+        handler: Callable[[], Awaitable[Any]]
+    ) -> Tuple[dict, bool]:
+        """Claim, run and store; returns (record, whether it came from an earlier request)"""
+        deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            record = await self._claim(record_id, fingerprint)
+            if record is None:
+                break
+            if record["status"] == DONE:
+                self.cache.set(record_id, record)
+                return record, True
+            if record["status"] == PENDING:
+                self._check_fingerprint(record, fingerprint)
+            if time.monotonic() > deadline:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this Idempotency-Key is still in progress"
+                )
+            await asyncio.sleep(IDEMPOTENCY_POLL_SECONDS)
+
+        try:
+            status_code, body = status.HTTP_200_OK, orjson.dumps(await handler())
+        except HTTPException as e:
+            if e.status_code >= 500:
+                await self.collection.delete_one({"_id": record_id, "status": PENDING})
+                raise
+            status_code, body = e.status_code, orjson.dumps({"detail": e.detail})
+        except BaseException:
+            await self.collection.delete_one({"_id": record_id, "status": PENDING})
+            raise
+
+        record = {
+            "_id": record_id,
+            "fingerprint": fingerprint,
+            "status": DONE,
+            "status_code": status_code,
+            "body": body,
+            "created_at": datetime.utcnow()
+        }
+        await self.collection.replace_one({"_id": record_id}, record, upsert=True)
+        self.cache.set(record_id, record)
+        self.executed += 1
+        return record, False
+
+    def _respond(self, record: dict, headers: dict = None) -> Response:
+        return Response(
+            content=record["body"],
+            status_code=record["status_code"],
+            headers=headers,
+            media_type="application/json"
+        )
+
+    def _check_fingerprint(self, record: dict, fingerprint: str):
+        if record["fingerprint"] != fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for a different request"
+            )
+
+    def _replay(self, record: dict, fingerprint: str) -> Response:
+        self._check_fingerprint(record, fingerprint)
+        self.replayed += 1
+        return self._respond(record, {"Idempotent-Replayed": "true"})
+
+    def stats(self) -> dict:
+        return {
+            "executed": self.executed,
+            "replayed": self.replayed,
+            "in_flight": len(self.in_flight),
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses
+        }
+
+idempotency = Idempotency(idempotency_collection)
@@ -0,0 +1,147 @@
+from collections import deque
+from itertools import islice
+from typing import AsyncIterator, Deque, Dict, List, Optional
+from bson import ObjectId
+import asyncio
+import logging
+import orjson
+import os
+
+logger = logging.getLogger(__name__)
+
+# Frames a subscriber may fall behind before it is dropped as too slow
+LIVE_QUEUE_SIZE = int(os.getenv("LIVE_QUEUE_SIZE", "64"))
+# Comment frame sent to idle streams so proxies keep them open
+LIVE_HEARTBEAT_SECONDS = float(os.getenv("LIVE_HEARTBEAT_SECONDS", "15"))
+
+HEARTBEAT = b": ping\n\n"
+
+def sse_frame(event: str, data: dict) -> bytes:
+    """One Server-Sent Events frame"""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+class Channel:
+    """One product's recent frames, shared by every stream watching it
+
+    Frames are numbered in publish order and only the last LIVE_QUEUE_SIZE
+    are kept (None meaning 'stream over'). Each stream reads on from its own
+    position, so publishing is an append plus one wake-up, scheduled after
+    the publisher returns and shared by everything published meanwhile.
+    """
+
+    def __init__(self):
+        self.frames: Deque[Optional[bytes]] = deque(maxlen=LIVE_QUEUE_SIZE)
+        self.end = 0
+        self.subscribers = 0
+        self.changed = asyncio.Event()
+        self._wake_scheduled = False
+
+    def append(self, frame: Optional[bytes]):
+        self.frames.append(frame)
+        self.end += 1
+        if not self._wake_scheduled:
+            self._wake_scheduled = True
+            asyncio.get_running_loop().call_soon(self._wake)
+
+    def _wake(self):
+        self._wake_scheduled = False
+        self.changed.set()
+        self.changed.clear()
+
+    def read(self, position: int) -> Optional[List[Optional[bytes]]]:
+        """Frames from `position` on, None if some were already overwritten"""
+        first = self.end - len(self.frames)
+        if position < first:
+            return None
+        return list(islice(self.frames, position - first, None))
+
+class Broadcaster:
+    """Per-product channels fanning events out to live subscribers
+
+    A publish serializes the frame once and appends it to the product's
+    channel without touching any subscriber; each stream's own task picks
+    the frame up when woken, so the cost of a publish doesn't grow with the
+    audience and one slow client never holds up the others. A client that
+    falls more than LIVE_QUEUE_SIZE frames behind is dropped (its stream
+    ends and it reconnects for a fresh snapshot).
+    """
+
+    def __init__(self):
+        self.channels: Dict[ObjectId, Channel] = {}
+        self.published = 0
+        self.dropped = 0
+
+    def publish(self, product_id: ObjectId, event: str, data: dict) -> int:
+        """Send an event to everyone watching a product; returns how many are watching"""
+        return self._append(product_id, sse_frame(event, data))
+
+    def publish_many(self, product_id: ObjectId, event: str, items: List[dict]) -> int:
+        """Send several events of one kind as a single frame, e.g. a batch of bids"""
+        if not items:
+            return 0
+        return self._append(product_id, b"".join(sse_frame(event, data) for data in items))
+
+    def _append(self, product_id: ObjectId, frame: bytes) -> int:
+        channel = self.channels.get(product_id)
+        if channel is None:
+            return 0
+        channel.append(frame)
+        self.published += 1
+        return channel.subscribers
+
+    def close_channel(self, product_id: ObjectId):
+        """End every stream on a product (auction over) after its queued frames"""
+        channel = self.channels.pop(product_id, None)
+        if channel is not None:
+            channel.append(None)
+
+    async def stream(self, product_id: ObjectId, snapshot: dict) -> AsyncIterator[bytes]:
+        """SSE body for one client: a snapshot, then live events and heartbeats"""
+        channel = self.channels.get(product_id)
+        if channel is None:
+            channel = self.channels[product_id] = Channel()
+        channel.subscribers += 1
+        position = channel.end
+        try:
+            yield sse_frame("snapshot", snapshot)
+            while True:
+                if position == channel.end:
+                    await channel.changed.wait()
+                    continue
+                frames = channel.read(position)
+                if frames is None:
+                    self.dropped += 1
+                    return
+                position = channel.end
+                closed = None in frames
+                if closed:
+                    frames = frames[:frames.index(None)]
+                if frames:
+                    yield b"".join(frames)
+                if closed:
+                    return
+        finally:
+            channel.subscribers -= 1
+            if not channel.subscribers and self.channels.get(product_id) is channel:
+                del self.channels[product_id]
+
+    def heartbeat(self):
+        """Append a comment frame to every channel; it counts toward falling behind like any frame"""
+        for channel in self.channels.values():
+            channel.append(HEARTBEAT)
+
+    async def run_heartbeats(self, interval: float = LIVE_HEARTBEAT_SECONDS):
+        """Background loop keeping idle streams open through proxies"""
+        while True:
+            await asyncio.sleep(interval)
+            self.heartbeat()
+
+    def stats(self) -> dict:
+        return {
+            "channels": len(self.channels),
+            "subscribers": sum(channel.subscribers for channel in self.channels.values()),
+            "published": self.published,
+            "dropped": self.dropped
+        }
+
+broadcaster = Broadcaster()
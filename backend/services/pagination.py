@@ -0,0 +1,85 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Tuple
+from bson import ObjectId
+
+def _encode_value(value: Any) -> Any:
+    """Tag non-JSON sort values so they round-trip through the cursor"""
+    if isinstance(value, datetime):
+        return {"$d": value.isoformat()}
+    if isinstance(value, ObjectId):
+        return {"$o": str(value)}
+    return value
+
+def _decode_value(value: Any) -> Any:
+    """Reverse of _encode_value"""
+    if isinstance(value, dict):
+        if "$d" in value:
+            return datetime.fromisoformat(value["$d"])
+        if "$o" in value:
+            return ObjectId(value["$o"])
+    return value
+
+def encode_cursor(sort_field: str, sort_direction: int, value: Any, last_id: ObjectId) -> str:
+    """Build an opaque cursor pointing just after the given sort key"""
+    payload = {
+        "f": sort_field,
+        "d": sort_direction,
+        "v": _encode_value(value),
+        "i": str(last_id),
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort_field: str, sort_direction: int) -> Tuple[Any, ObjectId]:
+    """Decode a cursor and check it was issued for the same sort"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value = _decode_value(payload["v"])
+        last_id = ObjectId(payload["i"])
+        field, direction = payload["f"], payload["d"]
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+    if field != sort_field or direction != sort_direction:
+        raise ValueError("Cursor does not match the requested sort order")
+
+    return value, last_id
+
+def cursor_for_document(sort_field: str, sort_direction: int, document: dict) -> str:
+    """Build the cursor that resumes after the given document"""
+    return encode_cursor(sort_field, sort_direction, document.get(sort_field), document["_id"])
+
+def keyset_filter(sort_field: str, sort_direction: int, value: Any, last_id: ObjectId) -> dict:
+    """Filter matching every document that sorts after (value, last_id)"""
+    op = "$lt" if sort_direction == -1 else "$gt"
+
+    if value is None:
+        # Nulls sort first ascending and last descending
+        if sort_direction == -1:
+            return {sort_field: None, "_id": {op: last_id}}
+        return {"$or": [
+            {sort_field: None, "_id": {op: last_id}},
+            {sort_field: {"$ne": None}},
+        ]}
+
+    clauses = [
+        {sort_field: {op: value}},
+        {sort_field: value, "_id": {op: last_id}},
+    ]
+    if sort_direction == -1:
+        clauses.append({sort_field: None})
+    return {"$or": clauses}
+
+def apply_cursor(filter_query: dict, cursor: Optional[str], sort_field: str, sort_direction: int) -> dict:
+    """Add the keyset condition for a cursor to a filter query"""
+    if not cursor:
+        return filter_query
+
+    value, last_id = decode_cursor(cursor, sort_field, sort_direction)
+    filter_query.setdefault("$and", []).append(
+        keyset_filter(sort_field, sort_direction, value, last_id)
+    )
+    return filter_query
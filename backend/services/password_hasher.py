@@ -0,0 +1,59 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+from fastapi import HTTPException, status
+import asyncio
+import os
+
+T = TypeVar("T")
+
+# Threads running bcrypt; the bcrypt library releases the GIL, so these run in parallel
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Hash/verify calls allowed to wait for a thread; beyond that, requests are turned away
+PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "32"))
+# Seconds clients are told to wait before retrying a rejected login
+PASSWORD_HASH_RETRY_AFTER_SECONDS = 1
+
+class PasswordHasher:
+    """Runs bcrypt on a small thread pool instead of the event loop
+
+    One bcrypt call takes tens of milliseconds of CPU; run inline it stalls
+    every other request on the worker. Calls beyond the running ones wait
+    in a bounded queue, and once that is full new calls get a 503 with
+    Retry-After right away, so a login storm can't build an unbounded
+    backlog (or starve the rest of the API of the event loop).
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self.capacity = workers + queue_size
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    async def run(self, function: Callable[..., T], *args) -> T:
+        if self.pending >= self.capacity:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many sign-in requests, please retry shortly",
+                headers={"Retry-After": str(PASSWORD_HASH_RETRY_AFTER_SECONDS)}
+            )
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending,
+            "capacity": self.capacity,
+            "completed": self.completed,
+            "rejected": self.rejected
+        }
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE_SIZE)
@@ -0,0 +1,52 @@
+from typing import Optional
+from bson import ObjectId
+from database import products_collection
+from services.cache import TTLCache
+from services.etag import PRODUCT_VERSION_PROJECTION
+import os
+
+PRODUCT_CACHE_MAX_ENTRIES = int(os.getenv("PRODUCT_CACHE_MAX_ENTRIES", "5000"))
+PRODUCT_CACHE_TTL_SECONDS = float(os.getenv("PRODUCT_CACHE_TTL_SECONDS", "30"))
+
+class ProductCache(TTLCache):
+    """Active product documents keyed by ObjectId
+
+    Every write bumps `epoch`; a loader only stores what it read if no write
+    landed while its find_one was in flight, so a slow read can't resurrect a
+    document that a bid or order has already changed.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        super().__init__(max_entries, ttl)
+        self.epoch = 0
+
+    def invalidate(self, product_id: ObjectId):
+        self.epoch += 1
+        self.pop(product_id)
+
+product_cache = ProductCache(PRODUCT_CACHE_MAX_ENTRIES, PRODUCT_CACHE_TTL_SECONDS)
+
+async def get_active_product(product_id: ObjectId) -> Optional[dict]:
+    """Active product document, served from the cache when possible"""
+    product = product_cache.get(product_id)
+    if product is not None:
+        return product
+
+    epoch = product_cache.epoch
+    product = await products_collection.find_one({"_id": product_id, "is_active": True})
+    if product and product_cache.epoch == epoch:
+        product_cache.set(product_id, product)
+    return product
+
+async def get_product_version(product_id: ObjectId) -> Optional[dict]:
+    """Version fields of an active product, for ETag checks without a full fetch"""
+    product = product_cache.get(product_id)
+    if product is not None:
+        return product
+
+    product = await products_collection.find_one({"_id": product_id}, PRODUCT_VERSION_PROJECTION)
+    return product if product and product.get("is_active") else None
+
+def invalidate_product(product_id: ObjectId):
+    """Drop a product from the cache; call after any write to that product"""
+    product_cache.invalidate(product_id)
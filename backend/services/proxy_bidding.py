@@ -0,0 +1,100 @@
+from datetime import datetime
+from itertools import count
+from typing import Dict, List, Optional, Tuple
+import heapq
+
+# (price below, increment) steps; the last one applies to everything above
+BID_INCREMENTS = (
+    (1, 0.05), (5, 0.25), (25, 0.5), (100, 1), (250, 2.5),
+    (500, 5), (1000, 10), (2500, 25), (5000, 50), (float("inf"), 100)
+)
+
+def bid_increment(price: float) -> float:
+    """Smallest step a bid has to beat `price` by"""
+    for below, increment in BID_INCREMENTS:
+        if price < below:
+            return increment
+    return BID_INCREMENTS[-1][1]
+
+class ProxyBook:
+    """Secret maximum bids of one auction, highest first
+
+    `maxima` maps user id -> {"max", "user_name", "created_at"} (the shape
+    stored in the product's proxy_maxima field). The heap keeps
+    (-max, created_at, sequence, user id) so equal maxima go to whoever set
+    theirs first; raising a maximum pushes a new entry and the old one is
+    skipped lazily, keeping every operation O(log n). Only the entry with a
+    user's latest sequence number is current, so restoring an earlier
+    maximum never leaves two live entries for the same user.
+    """
+
+    def __init__(self, maxima: Optional[Dict[str, dict]] = None):
+        self.maxima: Dict[str, dict] = {}
+        self.heap: List[Tuple[float, datetime, int, str]] = []
+        self.sequences: Dict[str, int] = {}
+        self._sequence = count()
+        for user_id, entry in (maxima or {}).items():
+            self.set(user_id, entry)
+
+    def __len__(self) -> int:
+        return len(self.maxima)
+
+    def set(self, user_id: str, entry: dict) -> Optional[dict]:
+        """Record a user's maximum; returns the entry it replaced (for restore)"""
+        previous = self.maxima.get(user_id)
+        self.maxima[user_id] = entry
+        sequence = self.sequences[user_id] = next(self._sequence)
+        heapq.heappush(self.heap, (-entry["max"], entry["created_at"], sequence, user_id))
+        if len(self.heap) > 2 * len(self.maxima) + 16:
+            self.heap = [item for item in self.heap if self._is_current(item)]
+            heapq.heapify(self.heap)
+        return previous
+
+    def restore(self, user_id: str, previous: Optional[dict]):
+        """Undo a set() whose batch was not persisted"""
+        if previous is None:
+            self.maxima.pop(user_id, None)
+            self.sequences.pop(user_id, None)
+        else:
+            self.set(user_id, previous)
+
+    def _is_current(self, item: Tuple[float, datetime, int, str]) -> bool:
+        return self.sequences.get(item[3]) == item[2]
+
+    def _drop_stale(self):
+        while self.heap and not self._is_current(self.heap[0]):
+            heapq.heappop(self.heap)
+
+    def leaders(self) -> Tuple[Optional[str], Optional[str]]:
+        """Users holding the highest and second-highest maxima"""
+        self._drop_stale()
+        if not self.heap:
+            return None, None
+        top = heapq.heappop(self.heap)
+        self._drop_stale()
+        runner = self.heap[0][3] if self.heap else None
+        heapq.heappush(self.heap, top)
+        return top[3], runner
+
+def resolve(proxies: ProxyBook, price: float, holder: Optional[str]) -> List[Tuple[str, float]]:
+    """Bids the proxies place against a visible (price, holder)
+
+    Returns (user id, amount) in order: the runner-up's exhausted maximum
+    when it beats the visible price, then the leader at the lowest amount
+    that wins (runner-up + one increment, capped at the leader's maximum).
+    A whole bidding war between maxima resolves to at most these two bids.
+    """
+    leader, runner = proxies.leaders()
+    if leader is None or proxies.maxima[leader]["max"] < price:
+        return []
+    leader_max = proxies.maxima[leader]["max"]
+
+    bids = []
+    lower = price + bid_increment(price)
+    if runner is not None and proxies.maxima[runner]["max"] > price:
+        price, holder = proxies.maxima[runner]["max"], runner
+        bids.append((holder, price))
+        lower = price + bid_increment(price)
+    if leader != holder:
+        bids.append((leader, round(min(leader_max, lower), 2)))
+    return bids
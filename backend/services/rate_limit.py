@@ -0,0 +1,177 @@
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from fastapi.responses import JSONResponse
+from auth import decode_access_token
+import math
+import os
+import re
+import time
+
+# Distinct clients tracked per rule; past this the least recently seen are forgotten
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "100000"))
+# The API is deployed behind the HTTPS ingress proxy (see REACT_APP_BACKEND_URL), so
+# scope["client"] is the proxy and IP buckets are keyed on X-Forwarded-For instead.
+# Set to "false" only if clients reach the app directly, or they could pick their own key.
+RATE_LIMIT_TRUST_FORWARDED_FOR = os.getenv("RATE_LIMIT_TRUST_FORWARDED_FOR", "true").lower() == "true"
+# Proxies in front of the app that append to X-Forwarded-For; the client is the address
+# the outermost of them saw, that many entries from the end (earlier ones are client-supplied)
+RATE_LIMIT_PROXY_HOPS = int(os.getenv("RATE_LIMIT_PROXY_HOPS", "1"))
+
+# (name, method, path pattern, scope, default limit); a limit is "<requests>/<seconds>"
+# and is overridden by the RATE_LIMIT_<NAME> environment variable, e.g. RATE_LIMIT_LOGIN_IP="20/60"
+RATE_LIMIT_RULES = (
+    ("login_ip", "POST", r"/api/auth/login", "ip", "10/60"),
+    ("register_ip", "POST", r"/api/auth/register", "ip", "5/600"),
+    ("bid_user", "POST", r"/api/products/[^/]+/bid", "user", "20/10"),
+    ("bid_ip", "POST", r"/api/products/[^/]+/bid", "ip", "100/10"),
+)
+
+def parse_limit(limit: str) -> Tuple[float, float]:
+    """"10/60" -> (10 requests, 60 seconds)"""
+    requests, seconds = limit.split("/")
+    return float(requests), float(seconds)
+
+class TokenBucketLimiter:
+    """Token buckets for one rule, keyed by client
+
+    A bucket is just (tokens, last update), refilled lazily when its client
+    shows up again. The OrderedDict is kept in least-recently-seen order, so
+    idle buckets are evicted from the front in O(1): a bucket untouched for
+    `seconds` would be full again, which is the same as having none.
+    """
+
+    def __init__(self, requests: float, seconds: float, max_clients: int = RATE_LIMIT_MAX_CLIENTS):
+        self.capacity = requests
+        self.rate = requests / seconds
+        self.idle = seconds
+        self.max_clients = max_clients
+        self.buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def _tokens(self, client: str, now: float) -> float:
+        bucket = self.buckets.get(client)
+        if bucket is None:
+            return self.capacity
+        return min(self.capacity, bucket[0] + (now - bucket[1]) * self.rate)
+
+    def wait(self, client: str, now: float) -> float:
+        """0 if the client has a token, else seconds until it will"""
+        tokens = self._tokens(client, now)
+        return 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+
+    def take(self, client: str, now: float):
+        """Spend one token (after wait() returned 0)"""
+        self.buckets[client] = (self._tokens(client, now) - 1, now)
+        self.buckets.move_to_end(client)
+        self._evict(now)
+
+    def _evict(self, now: float):
+        buckets = self.buckets
+        while buckets:
+            client = next(iter(buckets))
+            if now - buckets[client][1] < self.idle and len(buckets) <= self.max_clients:
+                return
+            buckets.popitem(last=False)
+
+class RateRule:
+    __slots__ = ("name", "method", "pattern", "scope", "limiter")
+
+    def __init__(self, name: str, method: str, pattern: str, scope: str, limit: str):
+        self.name = name
+        self.method = method
+        self.pattern = re.compile(pattern)
+        self.scope = scope
+        self.limiter = TokenBucketLimiter(*parse_limit(limit))
+
+def load_rules() -> List[RateRule]:
+    return [
+        RateRule(name, method, pattern, scope, os.getenv(f"RATE_LIMIT_{name.upper()}", limit))
+        for name, method, pattern, scope, limit in RATE_LIMIT_RULES
+    ]
+
+def client_ip(scope: dict) -> str:
+    if RATE_LIMIT_TRUST_FORWARDED_FOR:
+        for name, value in scope["headers"]:
+            if name == b"x-forwarded-for":
+                addresses = value.decode("latin-1").split(",")
+                return addresses[-min(RATE_LIMIT_PROXY_HOPS, len(addresses))].strip()
+    client = scope.get("client")
+    return client[0] if client else ""
+
+def client_user(scope: dict) -> Optional[str]:
+    """User id of a valid bearer token (a cached decode), None otherwise"""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer":
+                return None
+            try:
+                return decode_access_token(token).get("sub")
+            except Exception:
+                return None
+    return None
+
+class RateLimiter:
+    """Every rule's buckets, shared by the middleware and /api/stats/caches
+
+    A request matching some rules is checked against each of its buckets
+    (per IP, or per user for authenticated routes; unauthenticated requests
+    skip user buckets and get their 401 from the route) and only takes a
+    token from them when none is empty, so a rejected request costs nothing.
+    """
+
+    def __init__(self, rules: Optional[List[RateRule]] = None):
+        self.rules = load_rules() if rules is None else rules
+        self.methods = {rule.method for rule in self.rules}
+        self.limited = 0
+
+    def check(self, scope: dict) -> float:
+        """Seconds the request must wait, 0 when it may go ahead"""
+        method, path = scope["method"], scope["path"]
+        now = time.monotonic()
+        matched = []
+        for rule in self.rules:
+            if rule.method != method or not rule.pattern.fullmatch(path):
+                continue
+            client = client_ip(scope) if rule.scope == "ip" else client_user(scope)
+            if client is None:
+                continue
+            wait = rule.limiter.wait(client, now)
+            if wait:
+                self.limited += 1
+                return wait
+            matched.append((rule.limiter, client))
+        for limiter, client in matched:
+            limiter.take(client, now)
+        return 0.0
+
+    def stats(self) -> dict:
+        return {
+            "limited": self.limited,
+            "clients": {rule.name: len(rule.limiter.buckets) for rule in self.rules}
+        }
+
+class RateLimitMiddleware:
+    """ASGI middleware applying token-bucket limits to the expensive routes
+
+    Requests that match no rule pass straight through; a matching request
+    gets a 429 with Retry-After as soon as one of its buckets is empty.
+    """
+
+    def __init__(self, app, limiter: Optional[RateLimiter] = None):
+        self.app = app
+        self.limiter = rate_limiter if limiter is None else limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] in self.limiter.methods:
+            wait = self.limiter.check(scope)
+            if wait:
+                response = JSONResponse(
+                    {"detail": "Too many requests, please retry later"},
+                    status_code=429,
+                    headers={"Retry-After": str(math.ceil(wait))}
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+from database import revoked_tokens_collection
+from pymongo.errors import DuplicateKeyError
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# How often each worker picks up tokens revoked on other workers
+REVOCATION_SYNC_INTERVAL_SECONDS = float(os.getenv("REVOCATION_SYNC_INTERVAL_SECONDS", "2"))
+# Each sync re-reads this far behind its watermark, covering clock skew between workers
+REVOCATION_SYNC_OVERLAP = timedelta(seconds=30)
+# How often expired entries are dropped from memory
+REVOCATION_PRUNE_INTERVAL_SECONDS = 60
+
+class RevocationList:
+    """Token ids (jti) revoked before their expiry
+
+    Every worker holds the ids of revoked, unexpired tokens in a dict
+    (jti -> exp), so checking a request is one in-process lookup with no
+    false positives. Revocations are written to a TTL-indexed collection,
+    which drops them once the token would have expired anyway, and each
+    worker pulls the ones made elsewhere since its last sync.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.revoked: Dict[str, float] = {}
+        self._last_synced: Optional[datetime] = None
+        self._last_pruned = time.monotonic()
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        return jti is not None and jti in self.revoked
+
+    def _add(self, jti: str, expires_at: datetime):
+        self.revoked[jti] = expires_at.replace(tzinfo=timezone.utc).timestamp()
+
+    async def revoke(self, jti: str, exp: float):
+        """Revoke a token id until its expiry time (`exp` claim, epoch seconds)"""
+        expires_at = datetime.utcfromtimestamp(exp)
+        self._add(jti, expires_at)
+        try:
+            await self.collection.insert_one({"_id": jti, "expires_at": expires_at, "revoked_at": datetime.utcnow()})
+        except DuplicateKeyError:
+            pass
+
+    async def sync(self) -> int:
+        """Pull revocations made since the last sync (including by other workers)"""
+        query = {"expires_at": {"$gt": datetime.utcnow()}}
+        if self._last_synced is not None:
+            query["revoked_at"] = {"$gte": self._last_synced - REVOCATION_SYNC_OVERLAP}
+        count = 0
+        async for record in self.collection.find(query).sort("revoked_at", 1):
+            self._add(record["_id"], record["expires_at"])
+            self._last_synced = record["revoked_at"]
+            count += 1
+        if time.monotonic() - self._last_pruned > REVOCATION_PRUNE_INTERVAL_SECONDS:
+            self.prune()
+        return count
+
+    def prune(self):
+        """Forget revoked tokens that have expired on their own"""
+        now = time.time()
+        self._last_pruned = time.monotonic()
+        for jti in [jti for jti, exp in self.revoked.items() if exp <= now]:
+            del self.revoked[jti]
+
+    async def run(self, interval: float = REVOCATION_SYNC_INTERVAL_SECONDS):
+        """Background loop keeping the list in step with the collection"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.error(f"Revocation sync failed: {e}")
+
+revocation_list = RevocationList(revoked_tokens_collection)
@@ -0,0 +1,376 @@
+from bisect import bisect_left, insort
+from itertools import islice
+from typing import Any, Callable, Dict, Generator, List, Optional, Tuple
+from services.cache import TTLCache
+from services.trigram_index import TrigramIndex
+import asyncio
+import heapq
+import math
+import os
+import re
+
+# Indexed fields and their BM25F weights; a field's position is its field_index
+# in packed postings (2 bits, so at most four fields)
+SEARCH_FIELDS = ("name", "brand", "category", "description")
+FIELD_WEIGHTS = (3.0, 2.0, 1.5, 1.0)
+K1 = 1.2
+B = 0.75
+
+# Cap on vocabulary terms a single `prefix*` token can expand to
+MAX_PREFIX_EXPANSIONS = 50
+
+# Postings scored between yields to the event loop when searching from a request
+SEARCH_YIELD_POSTINGS = 2000
+# Ranked hits kept per cached query; pages past this are scored again
+SEARCH_RESULT_DEPTH = 200
+# Cached query results; keys carry the index version, so any index change retires them
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "500"))
+SEARCH_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "60"))
+
+# A search broken into steps: each next() does a bounded chunk of work, StopIteration carries the result
+Steps = Generator[None, None, Any]
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_QUERY_RE = re.compile(r'(-?)"([^"]*)"|(-?)(\S+)')
+
+def normalize_term(token: str) -> str:
+    """Light plural stemming so 'sneakers' matches 'sneaker'"""
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercase alphanumeric tokens with light stemming"""
+    if not text:
+        return []
+    return [normalize_term(token) for token in _TOKEN_RE.findall(text.lower())]
+
+def parse_query(query: str) -> dict:
+    """Split a query into terms, prefix terms, quoted phrases and exclusions ($text-style syntax)"""
+    parsed = {"terms": [], "prefixes": [], "phrases": [], "excluded": []}
+    for negated_phrase, phrase, negated, word in _QUERY_RE.findall(query):
+        if phrase:
+            tokens = tokenize(phrase)
+            if not tokens:
+                continue
+            if negated_phrase:
+                parsed["excluded"].extend(tokens)
+            else:
+                parsed["phrases"].append(tokens)
+                parsed["terms"].extend(tokens)
+            continue
+
+        if word.endswith("*") and not negated:
+            # Stemming a partial word would change what it prefixes
+            parsed["prefixes"].extend(_TOKEN_RE.findall(word.lower()))
+            continue
+
+        tokens = tokenize(word)
+        if negated:
+            parsed["excluded"].extend(tokens)
+        else:
+            parsed["terms"].extend(tokens)
+    return parsed
+
+def _keep(scores: Dict[int, float], predicate: Callable[[int], bool]) -> Steps:
+    """Scores of the documents passing `predicate`, as steps that pause between chunks"""
+    kept: Dict[int, float] = {}
+    items = iter(scores.items())
+    while True:
+        chunk = list(islice(items, SEARCH_YIELD_POSTINGS))
+        if not chunk:
+            return kept
+        kept.update((doc, s) for doc, s in chunk if predicate(doc))
+        yield
+
+def _run(steps: Steps):
+    """Drive search steps to completion without pausing"""
+    while True:
+        try:
+            next(steps)
+        except StopIteration as done:
+            return done.value
+
+class SearchIndex:
+    """In-memory inverted index over product text fields, ranked with BM25F
+
+    postings[term][doc] is a tuple of occurrences packed as
+    `position << 2 | field_index`, which gives per-field term frequencies for
+    ranking and positions for phrases without a list or tuple per field.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[int, Tuple[int, ...]]] = {}
+        self.vocabulary: List[str] = []
+        self.trigrams = TrigramIndex()
+        self.doc_ids: Dict[str, int] = {}
+        self.doc_keys: List[Optional[str]] = []
+        self.doc_terms: List[Optional[Tuple[str, ...]]] = []
+        self.doc_lengths: List[Optional[Tuple[int, ...]]] = []
+        self.doc_categories: List[Optional[str]] = []
+        self.free_slots: List[int] = []
+        self.field_length_totals = [0] * len(SEARCH_FIELDS)
+        self.doc_count = 0
+        # Bumped by every change; cached results are only valid for the version they were ranked on
+        self.version = 0
+        self.results = TTLCache(SEARCH_CACHE_MAX_ENTRIES, SEARCH_CACHE_TTL_SECONDS)
+
+    def __len__(self) -> int:
+        return self.doc_count
+
+    def upsert(self, product: dict):
+        """Index or re-index a product document; inactive products are removed"""
+        key = str(product["_id"])
+        self.remove(key)
+        if not product.get("is_active", True):
+            return
+        self.version += 1
+
+        field_tokens = [tokenize(product.get(field)) for field in SEARCH_FIELDS]
+        doc = self.free_slots.pop() if self.free_slots else len(self.doc_keys)
+        if doc == len(self.doc_keys):
+            self.doc_keys.append(None)
+            self.doc_terms.append(None)
+            self.doc_lengths.append(None)
+            self.doc_categories.append(None)
+
+        occurrences: Dict[str, List[int]] = {}
+        for field_index, tokens in enumerate(field_tokens):
+            for position, term in enumerate(tokens):
+                occurrences.setdefault(term, []).append(position << 2 | field_index)
+
+        for term, codes in occurrences.items():
+            term_postings = self.postings.get(term)
+            if term_postings is None:
+                term_postings = self.postings[term] = {}
+                insort(self.vocabulary, term)
+                self.trigrams.add(term)
+            term_postings[doc] = tuple(codes)
+
+        lengths = tuple(len(tokens) for tokens in field_tokens)
+        for field_index, length in enumerate(lengths):
+            self.field_length_totals[field_index] += length
+
+        self.doc_ids[key] = doc
+        self.doc_keys[doc] = key
+        self.doc_terms[doc] = tuple(occurrences)
+        self.doc_lengths[doc] = lengths
+        self.doc_categories[doc] = product.get("category")
+        self.doc_count += 1
+
+    def remove(self, product_id) -> bool:
+        """Drop a product from the index; returns False if it wasn't indexed"""
+        doc = self.doc_ids.pop(str(product_id), None)
+        if doc is None:
+            return False
+        self.version += 1
+
+        for term in self.doc_terms[doc]:
+            term_postings = self.postings[term]
+            del term_postings[doc]
+            if not term_postings:
+                del self.postings[term]
+                index = bisect_left(self.vocabulary, term)
+                del self.vocabulary[index]
+                self.trigrams.remove(term)
+
+        for field_index, length in enumerate(self.doc_lengths[doc]):
+            self.field_length_totals[field_index] -= length
+
+        self.doc_keys[doc] = None
+        self.doc_terms[doc] = None
+        self.doc_lengths[doc] = None
+        self.doc_categories[doc] = None
+        self.free_slots.append(doc)
+        self.doc_count -= 1
+        return True
+
+    def expand_prefix(self, prefix: str) -> List[str]:
+        """Vocabulary terms starting with prefix, via bisect on the sorted vocabulary"""
+        start = bisect_left(self.vocabulary, prefix)
+        terms = []
+        for term in self.vocabulary[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def _has_phrase(self, doc: int, phrase_postings: List[Dict[int, Tuple[int, ...]]]) -> bool:
+        """True if the phrase (given as its terms' postings) occurs contiguously within one field of the document"""
+        if not all(doc in term_postings for term_postings in phrase_postings):
+            return False
+        rest = [set(term_postings[doc]) for term_postings in phrase_postings[1:]]
+        for start in phrase_postings[0][doc]:
+            # Same field bits, position advanced by one per following term
+            if all(start + ((offset + 1) << 2) in codes for offset, codes in enumerate(rest)):
+                return True
+        return False
+
+    def _weighted_terms(self, parsed: dict, fuzzy: bool) -> Dict[str, float]:
+        """Query terms to score, each with a weight (1.0, or the similarity of a correction)"""
+        weights: Dict[str, float] = {}
+        for term in parsed["terms"]:
+            if fuzzy and term not in self.postings:
+                for correction, similarity in self.trigrams.similar(term):
+                    weights[correction] = max(weights.get(correction, 0.0), similarity)
+            else:
+                weights[term] = 1.0
+        for prefix in parsed["prefixes"]:
+            for term in self.expand_prefix(prefix):
+                weights[term] = 1.0
+        return weights
+
+    def _scoring(self, query: str, category: Optional[str], fuzzy: bool) -> Steps:
+        """BM25F scores of matching documents, as steps that pause about every
+        SEARCH_YIELD_POSTINGS postings
+
+        The index may change while paused: postings are walked from a snapshot
+        of their doc ids and removed documents are skipped.
+        """
+        parsed = parse_query(query)
+        terms = self._weighted_terms(parsed, fuzzy)
+
+        if not terms or not self.doc_count:
+            return {}
+
+        average_lengths = [max(total / self.doc_count, 1.0) for total in self.field_length_totals]
+        scores: Dict[int, float] = {}
+        pending = 0
+        for term, weight in terms.items():
+            term_postings = self.postings.get(term)
+            if not term_postings:
+                continue
+            df = len(term_postings)
+            idf = weight * math.log(1 + (self.doc_count - df + 0.5) / (df + 0.5))
+            docs = list(term_postings)
+            for start in range(0, len(docs), SEARCH_YIELD_POSTINGS):
+                chunk = docs[start:start + SEARCH_YIELD_POSTINGS]
+                for doc in chunk:
+                    codes = term_postings.get(doc)
+                    lengths = self.doc_lengths[doc]
+                    if codes is None or lengths is None:
+                        continue
+                    tf = 0.0
+                    for code in codes:
+                        field_index = code & 3
+                        tf += FIELD_WEIGHTS[field_index] / (1 - B + B * lengths[field_index] / average_lengths[field_index])
+                    scores[doc] = scores.get(doc, 0.0) + idf * tf / (K1 + tf)
+                pending += len(chunk)
+                if pending >= SEARCH_YIELD_POSTINGS:
+                    pending = 0
+                    yield
+
+        if category:
+            scores = yield from _keep(scores, lambda doc: self.doc_categories[doc] == category)
+
+        for phrase in [] if fuzzy else parsed["phrases"]:
+            if any(term not in self.postings for term in phrase):
+                return {}
+            phrase_postings = [self.postings[term] for term in phrase]
+            scores = yield from _keep(scores, lambda doc: self._has_phrase(doc, phrase_postings))
+
+        for term in parsed["excluded"]:
+            excluded = self.postings.get(term)
+            if excluded:
+                scores = yield from _keep(scores, lambda doc: doc not in excluded)
+
+        return scores
+
+    def _searching(
+        self,
+        query: str,
+        category: Optional[str],
+        fuzzy: bool,
+        count: int,
+        after: Optional[Tuple[float, str]]
+    ) -> Steps:
+        """Best `count` (score, product_id) pairs, score desc then product id
+        desc, and the number of matches, as steps that pause between chunks"""
+        scores = yield from self._scoring(query, category, fuzzy)
+        top: List[Tuple[float, str]] = []
+        ranked = iter(scores.items())
+        while True:
+            chunk = [(s, self.doc_keys[doc]) for doc, s in islice(ranked, SEARCH_YIELD_POSTINGS)]
+            if not chunk:
+                return top, len(scores)
+            chunk = [item for item in chunk if item[1] is not None and (after is None or item < after)]
+            top = heapq.nlargest(count, top + chunk)
+            yield
+
+    def score(self, query: str, category: Optional[str] = None, fuzzy: bool = False) -> Dict[int, float]:
+        """BM25F score for every matching document
+
+        With `fuzzy`, query terms missing from the vocabulary are replaced by
+        their closest trigram matches and phrase constraints are dropped.
+        """
+        return _run(self._scoring(query, category, fuzzy))
+
+    def search(
+        self,
+        query: str,
+        category: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 20,
+        after: Optional[Tuple[float, str]] = None,
+        fuzzy: bool = False
+    ) -> Tuple[List[Tuple[str, float]], int]:
+        """Ranked (product_id, score) page and the total number of matches
+
+        Ranking is score desc, then product id desc; `after` resumes a keyset
+        page just past the given (score, product_id).
+        """
+        top, total = _run(self._searching(query, category, fuzzy, offset + limit, after))
+        return [(key, s) for s, key in top[offset:]], total
+
+    async def _search_paused(
+        self,
+        query: str,
+        category: Optional[str],
+        fuzzy: bool,
+        count: int,
+        after: Optional[Tuple[float, str]]
+    ) -> Tuple[List[Tuple[float, str]], int]:
+        version = self.version
+        steps = self._searching(query, category, fuzzy, count, after)
+        while True:
+            try:
+                next(steps)
+            except StopIteration as done:
+                result = done.value
+                break
+            await asyncio.sleep(0)
+        if self.version != version:
+            # Documents changed (and slots may have been reused) while paused: search the current index in one go
+            result = _run(self._searching(query, category, fuzzy, count, after))
+        return result
+
+    async def search_async(
+        self,
+        query: str,
+        category: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 20,
+        after: Optional[Tuple[float, str]] = None,
+        fuzzy: bool = False
+    ) -> Tuple[List[Tuple[str, float]], int]:
+        """search() for request handlers
+
+        The top SEARCH_RESULT_DEPTH hits of a query are cached for the index
+        version they were ranked on, so repeated queries and following pages
+        are a slice. A query searched afresh gives the event loop back every
+        SEARCH_YIELD_POSTINGS postings instead of holding it throughout.
+        """
+        cached = self.results.get((self.version, query, category, fuzzy))
+        if cached is None:
+            cached = await self._search_paused(query, category, fuzzy, SEARCH_RESULT_DEPTH, None)
+            self.results.set((self.version, query, category, fuzzy), cached)
+
+        top, total = cached
+        if after is not None:
+            top = [item for item in top if item < after]
+        if len(top) < offset + limit and total > SEARCH_RESULT_DEPTH:
+            # The page reaches past the cached hits
+            top, total = await self._search_paused(query, category, fuzzy, offset + limit, after)
+        return [(key, s) for s, key in top[offset:offset + limit]], total
+
+search_index = SearchIndex()
@@ -0,0 +1,125 @@
+from fastapi import Response
+from typing import Any, Iterable, List
+import orjson
+
+# Response shapes accepted by the listing endpoints' `view` parameter
+VIEW_PATTERN = "^(card|full)$"
+# ... and by the order history's
+ORDER_VIEW_PATTERN = "^(full|summary)$"
+
+# Order history summary rows: item count and thumbnail computed in the query
+ORDER_SUMMARY_PROJECTION = {
+    "status": 1,
+    "total_amount": 1,
+    "created_at": 1,
+    "item_count": {"$sum": "$items.quantity"},
+    "thumbnail": {"$arrayElemAt": ["$items.image", 0]}
+}
+
+# Documents come from our own collection, written through the Product model,
+# so they are trusted as-is: no Pydantic round trip, no jsonable_encoder.
+
+def product_to_dict(product: dict) -> dict:
+    """Map a raw products document to the ProductResponse shape"""
+    return {
+        "id": str(product["_id"]),
+        "name": product["name"],
+        "description": product["description"],
+        "price": product["price"],
+        "original_price": product.get("original_price"),
+        "images": product["images"],
+        "category": product["category"],
+        "subcategory": product.get("subcategory"),
+        "condition": product["condition"],
+        "listing_type": product["listing_type"],
+        "seller": str(product["seller"]),
+        "seller_name": product["seller_name"],
+        "is_auction": product["is_auction"],
+        "auction_end_time": product.get("auction_end_time"),
+        "auction_status": product.get("auction_status"),
+        "current_bid": product.get("current_bid"),
+        "bid_count": product["bid_count"],
+        "buy_it_now": product["buy_it_now"],
+        "quantity": product["quantity"],
+        "brand": product.get("brand"),
+        "rating": product["rating"],
+        "review_count": product["review_count"],
+        "created_at": product["created_at"]
+    }
+
+def products_to_dicts(products: Iterable[dict]) -> List[dict]:
+    """Map a list of raw products documents to ProductResponse dicts"""
+    return [product_to_dict(product) for product in products]
+
+# Fields a grid card needs; everything else stays in Mongo
+CARD_FIELDS = (
+    "name", "price", "original_price", "listing_type", "is_auction", "auction_end_time",
+    "current_bid", "bid_count", "buy_it_now", "rating", "review_count"
+)
+
+def card_projection(*extra_fields: str) -> dict:
+    """find() projection for the card view; extra_fields keeps sort keys for cursors"""
+    projection = {field: 1 for field in CARD_FIELDS + extra_fields}
+    projection["images"] = {"$slice": 1}
+    return projection
+
+def product_to_card(product: dict) -> dict:
+    """Map a (card-projected) products document to the ProductCardResponse shape"""
+    images = product.get("images")
+    return {
+        "id": str(product["_id"]),
+        "name": product["name"],
+        "price": product["price"],
+        "original_price": product.get("original_price"),
+        "image": images[0] if images else None,
+        "listing_type": product["listing_type"],
+        "is_auction": product["is_auction"],
+        "auction_end_time": product.get("auction_end_time"),
+        "current_bid": product.get("current_bid"),
+        "bid_count": product["bid_count"],
+        "buy_it_now": product["buy_it_now"],
+        "rating": product["rating"],
+        "review_count": product["review_count"]
+    }
+
+def serialize_products(products: Iterable[dict], view: str = "full") -> List[dict]:
+    """Map raw products documents to dicts for the requested view"""
+    if view == "card":
+        return [product_to_card(product) for product in products]
+    return products_to_dicts(products)
+
+def order_to_dict(order: dict) -> dict:
+    """Map a raw orders document to the OrderResponse shape"""
+    return {
+        "id": str(order["_id"]),
+        "user_name": order["user_name"],
+        "items": order["items"],
+        "total_amount": order["total_amount"],
+        "tax_amount": order["tax_amount"],
+        "shipping_amount": order["shipping_amount"],
+        "status": order["status"],
+        "shipping_address": order.get("shipping_address"),
+        "payment_method": order["payment_method"],
+        "tracking_number": order.get("tracking_number"),
+        "created_at": order["created_at"]
+    }
+
+def order_to_summary(order: dict) -> dict:
+    """Map an ORDER_SUMMARY_PROJECTION row to the OrderSummaryResponse shape"""
+    return {
+        "id": str(order["_id"]),
+        "status": order["status"],
+        "total_amount": order["total_amount"],
+        "item_count": order["item_count"],
+        "thumbnail": order.get("thumbnail") or "",
+        "created_at": order["created_at"]
+    }
+
+def json_response(content: Any, status_code: int = 200, headers: dict = None) -> Response:
+    """Pre-rendered JSON response; FastAPI passes Response objects through untouched"""
+    return Response(
+        content=orjson.dumps(content),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json"
+    )
@@ -0,0 +1,116 @@
+from typing import Dict, List, Optional
+from bson import ObjectId
+from pymongo import UpdateOne
+from services.product_cache import invalidate_product
+import asyncio
+
+# Fields create_order needs from each product
+ORDER_PRODUCT_PROJECTION = {"name": 1, "price": 1, "images": {"$slice": 1}, "quantity": 1, "is_auction": 1}
+
+# Whether the deployment supports transactions, found out on the first reservation
+_transactions_supported: Optional[bool] = None
+
+async def load_order_products(products, product_ids: List[ObjectId]) -> Dict[ObjectId, dict]:
+    """Active products by id, in one $in query"""
+    cursor = products.find({"_id": {"$in": product_ids}, "is_active": True}, ORDER_PRODUCT_PROJECTION)
+    return {product["_id"]: product async for product in cursor}
+
+async def release_stock(products, quantities: Dict[ObjectId, int]):
+    """Put reserved quantities back (order failed or was rolled back)"""
+    if not quantities:
+        return
+    await products.bulk_write([
+        UpdateOne({"_id": product_id}, {"$inc": {"quantity": quantity}})
+        for product_id, quantity in quantities.items()
+    ], ordered=False)
+    for product_id in quantities:
+        invalidate_product(product_id)
+
+def _reserve_filter(product_id: ObjectId, quantity: int) -> dict:
+    return {"_id": product_id, "is_active": True, "is_auction": False, "quantity": {"$gte": quantity}}
+
+async def supports_transactions(client) -> bool:
+    """Whether the deployment can run multi-document transactions (replica set or sharded cluster)"""
+    global _transactions_supported
+    if _transactions_supported is None:
+        try:
+            hello = await client.admin.command("hello")
+            _transactions_supported = "setName" in hello or hello.get("msg") == "isdbgrid"
+        except Exception:
+            _transactions_supported = False
+    return _transactions_supported
+
+async def _unavailable(products, product_id: ObjectId) -> Exception:
+    """The error for a product that could not be reserved, by reading why"""
+    product = await products.find_one({"_id": product_id}, {"name": 1, "is_active": 1, "is_auction": 1, "quantity": 1})
+    if not product or not product.get("is_active"):
+        return LookupError(f"Product not found: {product_id}")
+    if product.get("is_auction"):
+        return ValueError(f"Cannot purchase auction item: {product['name']}")
+    return ValueError(f"Insufficient quantity for {product['name']}")
+
+async def _unreservable(products, quantities: Dict[ObjectId, int]) -> Optional[ObjectId]:
+    """The first item its product can't cover right now, read in one $in query"""
+    cursor = products.find({"_id": {"$in": list(quantities)}, "is_active": True, "is_auction": False}, {"quantity": 1})
+    stock = {product["_id"]: product.get("quantity", 0) async for product in cursor}
+    return next((product_id for product_id, quantity in quantities.items() if stock.get(product_id, 0) < quantity), None)
+
+async def _reserve_in_transaction(products, quantities: Dict[ObjectId, int]) -> Optional[ObjectId]:
+    async def reserve(session) -> bool:
+        result = await products.bulk_write([
+            UpdateOne(_reserve_filter(product_id, quantity), {"$inc": {"quantity": -quantity}})
+            for product_id, quantity in quantities.items()
+        ], ordered=False, session=session)
+        if result.modified_count != len(quantities):
+            # Nothing is committed; with_transaction returns without retrying
+            await session.abort_transaction()
+            return False
+        return True
+
+    async with await products.database.client.start_session() as session:
+        while True:
+            if await session.with_transaction(reserve):
+                return None
+            # The bulk result doesn't say which item missed; if none of them
+            # fails any more, stock came back in between and we try again
+            failed = await _unreservable(products, quantities)
+            if failed is not None:
+                return failed
+
+async def _reserve_concurrently(products, quantities: Dict[ObjectId, int]) -> Optional[ObjectId]:
+    results = await asyncio.gather(*(
+        products.update_one(_reserve_filter(product_id, quantity), {"$inc": {"quantity": -quantity}})
+        for product_id, quantity in quantities.items()
+    ), return_exceptions=True)
+    reserved = {
+        product_id: quantity for (product_id, quantity), result in zip(quantities.items(), results)
+        if not isinstance(result, BaseException) and result.modified_count
+    }
+    if len(reserved) == len(quantities):
+        return None
+
+    await release_stock(products, reserved)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return next(product_id for product_id in quantities if product_id not in reserved)
+
+async def reserve_stock(products, quantities: Dict[ObjectId, int]):
+    """Take quantities out of stock, all or nothing
+
+    Each decrement only applies while the product is an active fixed-price
+    listing with `quantity >= n`, so concurrent checkouts can never oversell.
+    On a replica set the decrements go out as one bulk_write inside a
+    transaction; otherwise they are sent concurrently and the ones that
+    applied are put back if any item fails. Raises LookupError if a product is gone or deactivated and
+    ValueError with the reason if it can't be bought in that quantity.
+    """
+    if await supports_transactions(products.database.client):
+        failed = await _reserve_in_transaction(products, quantities)
+    else:
+        failed = await _reserve_concurrently(products, quantities)
+    if failed is not None:
+        raise await _unavailable(products, failed)
+
+    for product_id in quantities:
+        invalidate_product(product_id)
@@ -0,0 +1,160 @@
+from bisect import bisect_left, insort
+from typing import Dict, List, Tuple
+import heapq
+import re
+import time
+
+# Popularity = review_count + BID_WEIGHT * bid_count
+BID_WEIGHT = 5
+# Memoized prefixes kept before the memo is reset
+MAX_CACHED_PREFIXES = 4096
+# Prefixes this short match most of the catalog, so a change only drops their
+# memo when it touches a listed suggestion; otherwise they refresh on a TTL
+SHORT_PREFIX_LENGTH = 3
+SHORT_PREFIX_TTL_SECONDS = 30
+# Below this many new keys, insort them; above it, append and re-sort once
+PENDING_INSORT_LIMIT = 1000
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+def normalize(text: str) -> str:
+    """Lowercase words joined by single spaces, so '16-inch' and '16 inch' match"""
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+def popularity(product: dict) -> int:
+    return product.get("review_count", 0) + BID_WEIGHT * product.get("bid_count", 0)
+
+class SuggestIndex:
+    """Typeahead over product names, brands and categories
+
+    `keys` is a sorted array of (normalized text, type, display) where the
+    text is every word-suffix of the suggestion, so "pro" finds "MacBook Pro".
+    A prefix lookup is two bisects plus a top-K over that slice; results are
+    memoized, and a change only drops the memo entries for prefixes of the
+    keys it touched. New keys wait in a pending list and are merged before
+    the next lookup (one sort for bulk loads, insort for a few), and removed
+    suggestions are compacted out in bulk.
+    """
+
+    def __init__(self):
+        self.keys: List[Tuple[str, str, str]] = []
+        # (type, display) -> [weight, number of products contributing]
+        self.suggestions: Dict[Tuple[str, str], List[int]] = {}
+        self.contributions: Dict[str, List[Tuple[Tuple[str, str], int]]] = {}
+        # prefix -> {limit: (results, computed_at)}
+        self._memo: Dict[str, Dict[int, Tuple[List[dict], float]]] = {}
+        self._pending: List[Tuple[str, str, str]] = []
+        self._stale_keys = 0
+
+    def __len__(self) -> int:
+        return len(self.suggestions)
+
+    def _keys_for(self, suggestion: Tuple[str, str]) -> List[Tuple[str, str, str]]:
+        kind, display = suggestion
+        words = normalize(display).split(" ")
+        return [(" ".join(words[i:]), kind, display) for i in range(len(words))]
+
+    def _forget(self, keys: List[Tuple[str, str, str]]):
+        """Drop memoized lookups whose prefix could match any of these keys"""
+        for text, kind, display in keys:
+            for end in range(1, len(text) + 1):
+                prefix = text[:end]
+                if end > SHORT_PREFIX_LENGTH:
+                    self._memo.pop(prefix, None)
+                    continue
+                memoized = self._memo.get(prefix)
+                if memoized and any(
+                    r["text"] == display and r["type"] == kind
+                    for results, _ in memoized.values() for r in results
+                ):
+                    del self._memo[prefix]
+
+    def _add(self, suggestion: Tuple[str, str], weight: int):
+        keys = self._keys_for(suggestion)
+        self._forget(keys)
+        entry = self.suggestions.get(suggestion)
+        if entry is not None:
+            entry[0] += weight
+            entry[1] += 1
+            return
+        self.suggestions[suggestion] = [weight, 1]
+        self._pending.extend(keys)
+
+    def _subtract(self, suggestion: Tuple[str, str], weight: int):
+        keys = self._keys_for(suggestion)
+        self._forget(keys)
+        entry = self.suggestions[suggestion]
+        entry[0] -= weight
+        entry[1] -= 1
+        if entry[1]:
+            return
+        # Its keys stay in the array until compaction; lookups skip them
+        del self.suggestions[suggestion]
+        self._stale_keys += len(keys)
+
+    def _ensure_sorted(self):
+        """Merge pending keys and compact removed ones before a lookup"""
+        if self._pending:
+            if len(self._pending) < PENDING_INSORT_LIMIT:
+                for key in self._pending:
+                    insort(self.keys, key)
+            else:
+                self.keys.extend(self._pending)
+                self.keys.sort()
+            self._pending = []
+        if self._stale_keys * 4 > len(self.keys):
+            self.keys = sorted({key for key in self.keys if (key[1], key[2]) in self.suggestions})
+            self._stale_keys = 0
+
+    def upsert(self, product: dict):
+        """Add or refresh a product's name, brand and category; inactive products are removed"""
+        self.remove(product["_id"])
+        if not product.get("is_active", True):
+            return
+
+        weight = popularity(product)
+        contributed = []
+        for kind, field in (("product", "name"), ("brand", "brand"), ("category", "category")):
+            display = product.get(field)
+            if display and normalize(display):
+                suggestion = (kind, display)
+                self._add(suggestion, weight)
+                contributed.append((suggestion, weight))
+        self.contributions[str(product["_id"])] = contributed
+
+    def remove(self, product_id) -> bool:
+        contributed = self.contributions.pop(str(product_id), None)
+        if contributed is None:
+            return False
+        for suggestion, weight in contributed:
+            self._subtract(suggestion, weight)
+        return True
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[dict]:
+        """Top completions for a prefix, most popular first"""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        now = time.monotonic()
+        cached = self._memo.get(prefix, {}).get(limit)
+        if cached is not None:
+            results, computed_at = cached
+            if len(prefix) > SHORT_PREFIX_LENGTH or now - computed_at < SHORT_PREFIX_TTL_SECONDS:
+                return results
+
+        self._ensure_sorted()
+        start = bisect_left(self.keys, (prefix,))
+        end = bisect_left(self.keys, (prefix + "\uffff",), start)
+        candidates = {
+            (kind, display) for _, kind, display in self.keys[start:end]
+            if (kind, display) in self.suggestions
+        }
+        top = heapq.nlargest(limit, candidates, key=lambda s: (self.suggestions[s][0], s[1]))
+        results = [{"text": display, "type": kind} for kind, display in top]
+
+        if len(self._memo) >= MAX_CACHED_PREFIXES:
+            self._memo.clear()
+        self._memo.setdefault(prefix, {})[limit] = (results, now)
+        return results
+
+suggest_index = SuggestIndex()
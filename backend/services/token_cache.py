@@ -0,0 +1,32 @@
+from typing import Hashable
+from services.cache import TTLCache
+import hashlib
+import os
+import time
+
+# Each entry is a 16-byte digest plus the small claims dict, well under 1 KB,
+# so the default cap keeps the cache to roughly 15 MB
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "20000"))
+# Upper bound on how long a verified token is trusted without re-checking
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", "900"))
+
+def token_digest(token: str) -> bytes:
+    """Cache key for a token; the raw token is never kept"""
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+class TokenCache(TTLCache):
+    """Claims of tokens whose signature has been verified, keyed by digest
+
+    The digest covers the whole token, signature included, so a hit can
+    only come from the exact token that was verified; an entry never
+    outlives the token's own `exp`.
+    """
+
+    def remember(self, key: Hashable, payload: dict):
+        ttl = self.ttl
+        if "exp" in payload:
+            ttl = min(ttl, payload["exp"] - time.time())
+        if ttl > 0:
+            self.set(key, payload, ttl)
+
+token_cache = TokenCache(TOKEN_CACHE_MAX_ENTRIES, TOKEN_CACHE_TTL_SECONDS)
@@ -0,0 +1,79 @@
+from typing import Tuple
+from services.cache import TTLCache
+import json
+import math
+import os
+
+# Count modes accepted by the listing endpoints
+COUNT_MODES = ("exact", "cached", "estimated", "has_next")
+COUNT_MODE_PATTERN = "^(" + "|".join(COUNT_MODES) + ")$"
+
+COUNT_CACHE_TTL_SECONDS = float(os.getenv("COUNT_CACHE_TTL_SECONDS", "30"))
+COUNT_CACHE_MAX_ENTRIES = int(os.getenv("COUNT_CACHE_MAX_ENTRIES", "1024"))
+ESTIMATED_COUNT_CAP = int(os.getenv("ESTIMATED_COUNT_CAP", "1000"))
+
+def filter_key(filter_query: dict) -> str:
+    """Canonical string for a Mongo filter, independent of key order; other values key on their full str()"""
+    return json.dumps(filter_query, sort_keys=True, default=str, separators=(",", ":"))
+
+count_cache = TTLCache(COUNT_CACHE_MAX_ENTRIES, COUNT_CACHE_TTL_SECONDS)
+
+def invalidate_counts():
+    """Drop cached totals; call after any write that adds, removes or re-filters products"""
+    count_cache.clear()
+
+async def count_products(collection, filter_query: dict, mode: str) -> Tuple[int, bool]:
+    """Return (total_count, is_exact) for a filter using the given count mode"""
+    if mode == "exact":
+        return await collection.count_documents(filter_query), True
+
+    if mode == "estimated":
+        if filter_query == {"is_active": True}:
+            # Unfiltered catalog: collection metadata, no scan at all
+            return await collection.estimated_document_count(), False
+        capped = await collection.count_documents(filter_query, limit=ESTIMATED_COUNT_CAP + 1)
+        if capped > ESTIMATED_COUNT_CAP:
+            return ESTIMATED_COUNT_CAP, False
+        return capped, True
+
+    # cached
+    key = filter_key(filter_query)
+    total_count = count_cache.get(key)
+    if total_count is None:
+        total_count = await collection.count_documents(filter_query)
+        count_cache.set(key, total_count)
+    return total_count, True
+
+async def paginate(collection, find_cursor, filter_query: dict, page: int, limit: int, mode: str) -> Tuple[list, dict]:
+    """Run a skip/limit page and build its pagination block for the given count mode"""
+    skip = (page - 1) * limit
+
+    if mode == "has_next":
+        # Fetch one extra row instead of counting
+        documents = await find_cursor.skip(skip).limit(limit + 1).to_list(length=limit + 1)
+        has_next = len(documents) > limit
+        return documents[:limit], {
+            "current_page": page,
+            "total_pages": None,
+            "total_count": None,
+            "total_exact": False,
+            "has_next": has_next,
+            "has_prev": page > 1
+        }
+
+    total_count, total_exact = await count_products(collection, filter_query, mode)
+    documents = await find_cursor.skip(skip).limit(limit).to_list(length=limit)
+    total_pages = math.ceil(total_count / limit)
+    has_next = page < total_pages
+    if not total_exact:
+        # Estimates can be off either way; only a short page marks the end
+        has_next = len(documents) == limit
+
+    return documents, {
+        "current_page": page,
+        "total_pages": total_pages,
+        "total_count": total_count,
+        "total_exact": total_exact,
+        "has_next": has_next,
+        "has_prev": page > 1
+    }
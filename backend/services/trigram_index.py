@@ -0,0 +1,74 @@
+from typing import Dict, List, Set, Tuple
+import math
+
+# Minimum Dice similarity (over padded trigrams) for a fuzzy match
+MIN_SIMILARITY = 0.5
+# Corrections kept per misspelled query term
+MAX_CORRECTIONS = 3
+# Terms shorter than this are too ambiguous to correct
+MIN_FUZZY_LENGTH = 4
+
+def trigrams(term: str) -> Set[str]:
+    """Padded character trigrams, pg_trgm style: 'mac' -> '  m', ' ma', 'mac', 'ac '"""
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class TrigramIndex:
+    """Trigram -> terms index over a vocabulary, for typo-tolerant term lookup
+
+    A candidate needs at least `m` trigrams in common with the query to reach
+    MIN_SIMILARITY, so by pigeonhole it must appear in one of the n - m + 1
+    rarest query trigram lists. Only those lists are scanned; the others are
+    probed by membership, so cost follows the rare trigrams' list sizes rather
+    than vocabulary (let alone catalog) size.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Set[str]] = {}
+        self.sizes: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+    def add(self, term: str):
+        if term in self.sizes:
+            return
+        grams = trigrams(term)
+        self.sizes[term] = len(grams)
+        for gram in grams:
+            self.postings.setdefault(gram, set()).add(term)
+
+    def remove(self, term: str):
+        if self.sizes.pop(term, None) is None:
+            return
+        for gram in trigrams(term):
+            terms = self.postings[gram]
+            terms.discard(term)
+            if not terms:
+                del self.postings[gram]
+
+    def similar(self, term: str, limit: int = MAX_CORRECTIONS) -> List[Tuple[str, float]]:
+        """Vocabulary terms most similar to `term`, as (term, dice similarity)"""
+        if len(term) < MIN_FUZZY_LENGTH:
+            return []
+
+        grams = sorted(trigrams(term), key=lambda g: len(self.postings.get(g, ())))
+        n = len(grams)
+        required = math.ceil(MIN_SIMILARITY * n / (2 - MIN_SIMILARITY))
+
+        candidates = set()
+        for gram in grams[:n - required + 1]:
+            candidates.update(self.postings.get(gram, ()))
+
+        lists = [self.postings.get(gram, set()) for gram in grams]
+        matches = []
+        for candidate in candidates:
+            if candidate == term:
+                continue
+            shared = sum(1 for terms in lists if candidate in terms)
+            similarity = 2 * shared / (n + self.sizes[candidate])
+            if similarity >= MIN_SIMILARITY:
+                matches.append((candidate, similarity))
+
+        matches.sort(key=lambda m: (-m[1], m[0]))
+        return matches[:limit]
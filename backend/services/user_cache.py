@@ -0,0 +1,59 @@
+from typing import Optional
+from bson import ObjectId
+from database import users_collection
+from models.user import UserResponse
+from services.cache import TTLCache
+import os
+
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+# Bounds how long another worker can serve a profile after it changed
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+
+# The UserResponse fields; the password hash and watchlist are never read
+USER_RESPONSE_PROJECTION = {"name": 1, "email": 1, "avatar": 1, "rating": 1, "member_since": 1, "is_verified": 1}
+
+class UserCache(TTLCache):
+    """UserResponse objects keyed by user id string
+
+    Like the product cache, every write bumps `epoch` and a loader only
+    stores what it read if no write landed meanwhile.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        super().__init__(max_entries, ttl)
+        self.epoch = 0
+
+    def invalidate(self, user_id: str):
+        self.epoch += 1
+        self.pop(user_id)
+
+user_cache = UserCache(USER_CACHE_MAX_ENTRIES, USER_CACHE_TTL_SECONDS)
+
+async def get_user_response(user_id: str) -> Optional[UserResponse]:
+    """Profile of an authenticated user, served from the cache when possible"""
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
+    if not ObjectId.is_valid(user_id):
+        return None
+
+    epoch = user_cache.epoch
+    user_doc = await users_collection.find_one({"_id": ObjectId(user_id)}, USER_RESPONSE_PROJECTION)
+    if user_doc is None:
+        return None
+    user = UserResponse(
+        id=str(user_doc["_id"]),
+        name=user_doc["name"],
+        email=user_doc["email"],
+        avatar=user_doc["avatar"],
+        rating=user_doc["rating"],
+        member_since=user_doc["member_since"],
+        is_verified=user_doc["is_verified"]
+    )
+    if user_cache.epoch == epoch:
+        user_cache.set(user_id, user)
+    return user
+
+def invalidate_user(user_id: str):
+    """Drop a user from the cache; call after any write to their profile fields"""
+    user_cache.invalidate(user_id)
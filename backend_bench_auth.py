@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Auth Dependency Overhead Benchmark
+Times the per-request cost of authenticating a bearer token: a bare
+jwt.decode (HS256 signature check plus claim parsing), the verified-token
+cache hit, and the whole get_current_user dependency with and without the
+token cache (the user profile comes from the warmed user cache, so no
+database round trip is included). Then fills the token cache with more
+distinct tokens than it may hold to show its memory stays capped. Runs
+in-process; no server or database needed.
+
+Usage:
+    python backend_bench_auth.py [--calls 20000] [--tokens 50000]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+
+import jwt
+from bson import ObjectId
+from fastapi.security import HTTPAuthorizationCredentials
+
+import auth
+from models.user import UserResponse
+from services.token_cache import TOKEN_CACHE_MAX_ENTRIES, token_cache
+from services.user_cache import user_cache
+
+def per_call_us(function, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return (time.perf_counter() - start) / calls * 1e6
+
+async def per_await_us(function, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        await function()
+    return (time.perf_counter() - start) / calls * 1e6
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--tokens", type=int, default=50000, help="distinct tokens for the memory test")
+    args = parser.parse_args()
+
+    user_id = str(ObjectId())
+    user_cache.set(user_id, UserResponse(
+        id=user_id, name="bench", email="bench@example.com", avatar="", rating=5.0,
+        member_since=datetime.utcnow(), is_verified=True
+    ))
+    token = auth.create_access_token({"sub": user_id})
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    def uncached_dependency():
+        token_cache.clear()
+        return auth.get_current_user(credentials)
+
+    print(f"🔑 Auth overhead per request, {args.calls} calls each\n")
+    decode = per_call_us(lambda: jwt.decode(token, auth.SECRET_KEY, algorithms=[auth.ALGORITHM]), args.calls)
+    cached = per_call_us(lambda: auth.decode_access_token(token), args.calls)
+    dependency_uncached = await per_await_us(uncached_dependency, args.calls)
+    dependency_cached = await per_await_us(lambda: auth.get_current_user(credentials), args.calls)
+    print(f"   {'jwt.decode':34s} {decode:7.2f} µs")
+    print(f"   {'token cache hit':34s} {cached:7.2f} µs  ({decode / cached:.1f}x faster)")
+    print(f"   {'get_current_user, no token cache':34s} {dependency_uncached:7.2f} µs")
+    print(f"   {'get_current_user, token cached':34s} {dependency_cached:7.2f} µs")
+
+    token_cache.clear()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(args.tokens):
+        auth.decode_access_token(auth.create_access_token({"sub": user_id, "n": i}))
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    print(f"\n📦 {args.tokens} distinct tokens: {len(token_cache)} cached "
+          f"(cap {TOKEN_CACHE_MAX_ENTRIES}), {size / 1024 / 1024:.1f} MB, "
+          f"{size / max(len(token_cache), 1):.0f} bytes/entry, {token_cache.evictions} evicted")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Bid Engine Throughput Benchmark
+Drives concurrent bidders at a handful of hot auctions in a scratch database
+and compares the per-request conditional update path (one update_one plus
+one insert_one per bid) with the batched single-writer bid engine used by
+POST /api/products/{id}/bid.
+
+Usage:
+    python backend_bench_bid_engine.py [--auctions 5] [--bidders 200] [--bids 20] [--keep]
+
+Reads MONGO_URL / DB_NAME from backend/.env; the scratch database is
+"<DB_NAME>_bid_bench" and is dropped afterwards unless --keep is given.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from itertools import count
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+
+from bson import ObjectId
+from dotenv import load_dotenv
+
+load_dotenv(Path(__file__).parent / "backend" / ".env")
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from services.bid_engine import BidEngine
+from services.proxy_bidding import ProxyBook, resolve
+
+def make_auctions(count_):
+    end = datetime.utcnow() + timedelta(days=1)
+    return [{
+        "_id": ObjectId(),
+        "name": f"Bench auction #{i}",
+        "price": 100.0,
+        "current_bid": None,
+        "bid_count": 0,
+        "is_auction": True,
+        "is_active": True,
+        "auction_end_time": end
+    } for i in range(count_)]
+
+def make_bid(product_id, amount):
+    return {
+        "_id": ObjectId(),
+        "product_id": product_id,
+        "user_id": ObjectId(),
+        "user_name": "bench",
+        "amount": amount,
+        "created_at": datetime.utcnow()
+    }
+
+async def direct_bid(products, bids, bid):
+    """The per-request conditional update path (one update, one insert)"""
+    result = await products.update_one(
+        {
+            "_id": bid["product_id"],
+            "is_active": True,
+            "is_auction": True,
+            "$and": [
+                {"$or": [{"current_bid": {"$lt": bid["amount"]}}, {"current_bid": None, "price": {"$lt": bid["amount"]}}]},
+                {"$or": [{"auction_end_time": None}, {"auction_end_time": {"$gte": bid["created_at"]}}]}
+            ]
+        },
+        {"$set": {"current_bid": bid["amount"], "last_bid_id": bid["_id"]}, "$inc": {"bid_count": 1}}
+    )
+    if not result.modified_count:
+        raise ValueError("rejected")
+    await bids.insert_one(bid)
+
+async def run(place, auctions, bidders, bids_per_bidder):
+    """Bidders loop over the auctions, each bid a tick above the last one issued"""
+    ticks = {auction["_id"]: count(1) for auction in auctions}
+    latencies, accepted = [], 0
+
+    async def bidder(index):
+        nonlocal accepted
+        for i in range(bids_per_bidder):
+            product_id = auctions[(index + i) % len(auctions)]["_id"]
+            bid = make_bid(product_id, 100.0 + next(ticks[product_id]))
+            start = time.perf_counter()
+            try:
+                await place(bid)
+                accepted += 1
+            except ValueError:
+                pass
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(bidder(i) for i in range(bidders)))
+    elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, accepted, latencies
+
+def report(name, throughput, accepted, latencies):
+    latencies = sorted(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))]
+    print(f"{name:22s} {throughput:9.0f} bids/s  accepted {accepted:6d}  "
+          f"mean {statistics.mean(latencies):7.2f} ms  p99 {p99:7.2f} ms")
+
+async def check(products, bids, auctions):
+    """Every auction's bid_count and current_bid must match its bid records"""
+    ok = True
+    for auction in auctions:
+        product = await products.find_one({"_id": auction["_id"]})
+        records = await bids.count_documents({"product_id": auction["_id"]})
+        top = await bids.find({"product_id": auction["_id"]}).sort("amount", -1).to_list(length=1)
+        ok &= product["bid_count"] == records and (not top or product["current_bid"] == top[0]["amount"])
+    return ok
+
+def check_proxy_restore():
+    """Undoing a raised maximum must leave one leader, not the same user twice"""
+    now = datetime.utcnow()
+    proxies = ProxyBook()
+    proxies.set("a", {"max": 100.0, "user_name": "a", "created_at": now})
+    proxies.set("b", {"max": 50.0, "user_name": "b", "created_at": now + timedelta(seconds=1)})
+    previous = proxies.set("a", {"max": 150.0, "user_name": "a", "created_at": now + timedelta(seconds=2)})
+    proxies.restore("a", previous)
+    return proxies.leaders() == ("a", "b") and resolve(proxies, 60.0, "a") == []
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--auctions", type=int, default=5)
+    parser.add_argument("--bidders", type=int, default=200)
+    parser.add_argument("--bids", type=int, default=20, help="bids per bidder")
+    parser.add_argument("--keep", action="store_true")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(os.environ["MONGO_URL"])
+    db = client[os.environ["DB_NAME"] + "_bid_bench"]
+    await client.drop_database(db.name)
+    await db.bids.create_index([("product_id", 1), ("created_at", -1)])
+
+    print(f"🔨 {args.bidders} bidders x {args.bids} bids over {args.auctions} auctions\n")
+
+    auctions = make_auctions(args.auctions)
+    await db.products.insert_many(auctions)
+    result = await run(lambda bid: direct_bid(db.products, db.bids, bid), auctions, args.bidders, args.bids)
+    report("update per bid", *result)
+    direct_ok = await check(db.products, db.bids, auctions)
+
+    auctions = make_auctions(args.auctions)
+    await db.products.insert_many(auctions)
+    engine = BidEngine(db.products, db.bids)
+    result = await run(engine.submit, auctions, args.bidders, args.bids)
+    await engine.close()
+    report("bid engine (batched)", *result)
+    engine_ok = await check(db.products, db.bids, auctions)
+    print(f"   {engine.stats()['batches']} batched writes, {engine.stats()['conflicts']} conflicts")
+
+    print(f"\n{'✅' if direct_ok else '❌'} update per bid: bid_count and current_bid match the bid records")
+    print(f"{'✅' if engine_ok else '❌'} bid engine: bid_count and current_bid match the bid records")
+    proxy_ok = check_proxy_restore()
+    print(f"{'✅' if proxy_ok else '❌'} proxy book: restoring a maximum leaves distinct leader and runner-up")
+
+    if not args.keep:
+        await client.drop_database(db.name)
+    return direct_ok and engine_ok and proxy_ok
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Concurrent Bidding Stress Test
+Fires hundreds of simultaneous bids at one auction through
+POST /api/products/{id}/bid, then checks that the final current_bid is the
+highest accepted bid, that bid_count and the bid history account for every
+accepted bid, and reports latency percentiles.
+
+Usage:
+    BACKEND_URL=http://localhost:8001 python backend_bench_bids.py [--bids 300] [--workers 100]
+
+Start the server with the bid rate limits raised (e.g. RATE_LIMIT_BID_USER
+and RATE_LIMIT_BID_IP set to 100000/1), or most bids come back 429.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BASE_URL = os.environ.get("BACKEND_URL", "http://localhost:8001") + "/api"
+TIMEOUT = 30
+BIDDERS = ["techhub@example.com", "sneakerking@example.com", "fashion@example.com", "vintage@example.com"]
+
+def login(email):
+    response = requests.post(f"{BASE_URL}/auth/login", json={"email": email, "password": "password123"}, timeout=TIMEOUT)
+    if response.status_code != 200:
+        return None
+    return response.json()["access_token"]
+
+def find_auction():
+    response = requests.get(
+        f"{BASE_URL}/products",
+        params={"sort_by": "ending_soon", "sort_order": "desc", "limit": 1},
+        timeout=TIMEOUT
+    )
+    products = response.json()["products"]
+    return products[0] if products else None
+
+def place_bid(product_id, token, amount):
+    start = time.perf_counter()
+    response = requests.post(
+        f"{BASE_URL}/products/{product_id}/bid",
+        params={"bid_amount": amount},
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=TIMEOUT
+    )
+    return amount, response.status_code, (time.perf_counter() - start) * 1000
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bids", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"🔨 Concurrent bidding against {BASE_URL}")
+    tokens = [token for token in map(login, BIDDERS) if token]
+    if not tokens:
+        print("❌ Could not log in any bidder")
+        return False
+
+    auction = find_auction()
+    if not auction:
+        print("❌ No open auction found")
+        return False
+    product_id = auction["id"]
+    start_bid = auction["current_bid"] or auction["price"]
+    print(f"   Auction: {auction['name']} (current bid ${start_bid}, {auction['bid_count']} bids)")
+
+    # Distinct amounts above the current bid, fired in random order
+    amounts = [round(start_bid + (i + 1) * 0.5, 2) for i in range(args.bids)]
+    random.shuffle(amounts)
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(lambda i: place_bid(product_id, tokens[i % len(tokens)], amounts[i]), range(args.bids)))
+
+    accepted = [amount for amount, code, _ in results if code == 200]
+    rejected = [amount for amount, code, _ in results if code == 400]
+    errors = [code for _, code, _ in results if code not in (200, 400)]
+    latencies = [ms for _, _, ms in results]
+
+    final = requests.get(f"{BASE_URL}/products/{product_id}", timeout=TIMEOUT).json()
+    history = requests.get(f"{BASE_URL}/products/{product_id}/bids", timeout=TIMEOUT).json()
+    history_amounts = {bid["amount"] for bid in history}
+
+    print(f"\n📊 {len(accepted)} accepted, {len(rejected)} rejected, {len(errors)} errors")
+    print(f"   latency mean {statistics.mean(latencies):.1f} ms  p50 {percentile(latencies, 0.5):.1f} ms  "
+          f"p99 {percentile(latencies, 0.99):.1f} ms  max {max(latencies):.1f} ms")
+
+    checks = {
+        "no server errors": not errors,
+        "final current_bid is the highest accepted bid": bool(accepted) and final["current_bid"] == max(accepted),
+        "no rejected bid beat the final bid": all(amount <= final["current_bid"] for amount in rejected),
+        "bid_count counts every accepted bid": final["bid_count"] == auction["bid_count"] + len(accepted),
+        "the latest accepted bids are in the history": all(amount in history_amounts for amount in sorted(accepted)[-50:])
+    }
+    for name, passed in checks.items():
+        print(f"{'✅' if passed else '❌'} {name}")
+    return all(checks.values())
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Checkout Concurrency Benchmark
+Sends many concurrent buyers with 20-item carts at a small set of products
+with limited stock, in a scratch database, and compares the old checkout
+path (a find_one per item, then an update_one per item) with the
+reservation used by POST /api/orders/create (one $in load, then one
+conditional update per item, sent concurrently, or run in one transaction
+on a replica set). Reports throughput, database operations per order, and
+whether any product was oversold.
+
+Usage:
+    python backend_bench_checkout.py [--products 40] [--stock 50] [--buyers 200] [--items 20] [--keep]
+
+Reads MONGO_URL / DB_NAME from backend/.env; the scratch database is
+"<DB_NAME>_checkout_bench" and is dropped afterwards unless --keep is given.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+
+from bson import ObjectId
+from dotenv import load_dotenv
+
+load_dotenv(Path(__file__).parent / "backend" / ".env")
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from services.stock import load_order_products, release_stock, reserve_stock
+
+class Counted:
+    """Collection wrapper counting the operations that hit the database"""
+
+    OPERATIONS = {"find", "find_one", "update_one", "bulk_write", "insert_one", "delete_many"}
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.calls = 0
+
+    def __getattr__(self, name):
+        if name in self.OPERATIONS:
+            self.calls += 1
+        return getattr(self.collection, name)
+
+def make_products(count, stock):
+    return [{
+        "_id": ObjectId(),
+        "name": f"Bench product #{i}",
+        "price": 10.0,
+        "images": [],
+        "quantity": stock,
+        "is_auction": False,
+        "is_active": True
+    } for i in range(count)]
+
+def make_cart(products, items):
+    return [(product["_id"], random.randint(1, 3)) for product in random.sample(products, items)]
+
+async def per_item_checkout(products, orders, cart):
+    """The old path: check each item, insert the order, then decrement each item"""
+    for product_id, quantity in cart:
+        product = await products.find_one({"_id": product_id, "is_active": True})
+        if product["quantity"] < quantity:
+            return False
+    await orders.insert_one({"items": [{"product_id": product_id, "quantity": quantity} for product_id, quantity in cart]})
+    for product_id, quantity in cart:
+        await products.update_one({"_id": product_id}, {"$inc": {"quantity": -quantity}})
+    return True
+
+async def batched_checkout(products, orders, cart):
+    """The create_order path: one load, an all-or-nothing reservation, one insert"""
+    quantities = dict(cart)
+    loaded = await load_order_products(products, list(quantities))
+    if any(loaded[product_id]["quantity"] < quantity for product_id, quantity in quantities.items()):
+        return False
+    try:
+        await reserve_stock(products, quantities)
+    except ValueError:
+        return False
+    try:
+        await orders.insert_one({"items": [{"product_id": product_id, "quantity": quantity} for product_id, quantity in cart]})
+    except Exception:
+        await release_stock(products, quantities)
+        raise
+    return True
+
+async def run(name, checkout, db, args):
+    products = make_products(args.products, args.stock)
+    await db.products.delete_many({})
+    await db.orders.delete_many({})
+    await db.products.insert_many(products)
+    counted = Counted(db.products)
+    carts = [make_cart(products, args.items) for _ in range(args.buyers)]
+
+    start = time.perf_counter()
+    placed = sum(await asyncio.gather(*(checkout(counted, db.orders, cart) for cart in carts)))
+    elapsed = time.perf_counter() - start
+
+    # Stock check: what every placed order took must equal what left the shelf
+    sold = {product["_id"]: 0 for product in products}
+    async for order in db.orders.find():
+        for item in order["items"]:
+            sold[item["product_id"]] += item["quantity"]
+    oversold = 0
+    async for product in db.products.find():
+        oversold += product["quantity"] < 0 or sold[product["_id"]] > args.stock
+    operations = (counted.calls + placed) / args.buyers
+
+    print(f"{name:22s} {args.buyers / elapsed:7.0f} checkouts/s  placed {placed:4d}  "
+          f"{operations:5.1f} operations/checkout  oversold products: {oversold}")
+    return oversold == 0
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=40)
+    parser.add_argument("--stock", type=int, default=50, help="units per product")
+    parser.add_argument("--buyers", type=int, default=200)
+    parser.add_argument("--items", type=int, default=20, help="distinct products per cart")
+    parser.add_argument("--keep", action="store_true")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(os.environ["MONGO_URL"])
+    db = client[os.environ["DB_NAME"] + "_checkout_bench"]
+    await client.drop_database(db.name)
+
+    print(f"🛒 {args.buyers} concurrent buyers, {args.items}-item carts, "
+          f"{args.products} products x {args.stock} units\n")
+    per_item_ok = await run("find/update per item", per_item_checkout, db, args)
+    batched_ok = await run("conditional reservation", batched_checkout, db, args)
+
+    print(f"\n{'✅' if per_item_ok else '❌'} find/update per item: no product oversold")
+    print(f"{'✅' if batched_ok else '❌'} conditional reservation: no product oversold")
+
+    if not args.keep:
+        await client.drop_database(db.name)
+    return batched_ok
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
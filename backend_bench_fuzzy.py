@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Fuzzy Search Scaling Benchmark
+Times typo-tolerant lookups (trigram candidate pruning) at growing catalog
+sizes and compares them with a brute-force scan that scores the query against
+every product name. Runs in-process, no server or database needed.
+
+Usage:
+    python backend_bench_fuzzy.py [--sizes 10000,25000,50000,100000,200000]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+
+from backend_bench_search import make_catalog
+from services.search_index import SearchIndex, tokenize
+from services.trigram_index import MIN_SIMILARITY, trigrams
+
+MISSPELLINGS = ["macbok", "playstaton", "iphnoe", "samsng", "jordna", "nintedo", "yeezzy", "headphnes", "vitamx", "legoo"]
+ROUNDS = 5
+
+def brute_force(products, term):
+    """Score the term against every word of every product name"""
+    query_grams = trigrams(term)
+    matches = 0
+    for product in products:
+        for word in tokenize(product["name"]):
+            grams = trigrams(word)
+            if 2 * len(query_grams & grams) / (len(query_grams) + len(grams)) >= MIN_SIMILARITY:
+                matches += 1
+                break
+    return matches
+
+def time_per_query(func, queries):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for query in queries:
+            func(query)
+    return (time.perf_counter() - start) / (ROUNDS * len(queries)) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,25000,50000,100000,200000")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    print("🔤 Fuzzy lookup cost vs catalog size\n")
+    print(f"{'products':>9s} {'vocabulary':>11s} {'trigram lookup':>15s} {'fuzzy search':>13s} {'brute force':>12s}")
+
+    baseline = None
+    for size in sizes:
+        products = make_catalog(size)
+        index = SearchIndex()
+        for product in products:
+            index.upsert(product)
+
+        lookup_ms = time_per_query(index.trigrams.similar, MISSPELLINGS)
+        search_ms = time_per_query(lambda q: index.search(q, limit=20, fuzzy=True), MISSPELLINGS)
+        brute_start = time.perf_counter()
+        for query in MISSPELLINGS:
+            brute_force(products, query)
+        brute_ms = (time.perf_counter() - brute_start) / len(MISSPELLINGS) * 1000
+
+        print(f"{size:>9d} {len(index.vocabulary):>11d} {lookup_ms:>12.3f} ms {search_ms:>10.2f} ms {brute_ms:>9.1f} ms")
+        if baseline is None:
+            baseline = (size, lookup_ms, brute_ms)
+
+    size0, lookup0, brute0 = baseline
+    print(f"\n📈 {sizes[-1] / size0:.0f}x more products: trigram lookup {lookup_ms / lookup0:.1f}x, brute force {brute_ms / brute0:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Live Bid Stream Load Test
+Holds thousands of idle subscribers on one auction's live stream (the same
+SSE generator GET /api/products/{id}/live returns), publishes a series of
+bid events, and reports the cost of a publish call and broadcast latency:
+the time from publish until each subscriber has the frame. A few
+subscribers stop reading until every event is out, more than the
+LIVE_QUEUE_SIZE frames a stream may fall behind, to show that slow
+consumers get dropped instead of delaying everyone else. Runs in-process,
+no server or database needed.
+
+Usage:
+    python backend_bench_live.py [--subscribers 5000] [--events 200] [--slow 10]
+"""
+
+import argparse
+import asyncio
+import resource
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+
+from bson import ObjectId
+from services.live import LIVE_QUEUE_SIZE, Broadcaster
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", type=int, default=5000)
+    parser.add_argument("--events", type=int, default=200, help=f"bid events (above the queue size, {LIVE_QUEUE_SIZE})")
+    parser.add_argument("--slow", type=int, default=10, help="subscribers that stop reading")
+    parser.add_argument("--interval", type=float, default=0.01, help="seconds between events")
+    args = parser.parse_args()
+
+    broadcaster = Broadcaster()
+    product_id = ObjectId()
+    snapshot = {"product_id": str(product_id), "current_bid": 100.0, "bid_count": 0}
+    published_at = []
+    latencies = []
+
+    published = asyncio.Event()
+
+    async def subscriber():
+        received = 0
+        async for frame in broadcaster.stream(product_id, snapshot):
+            # A stream that lags gets the frames it missed joined into one chunk
+            for _ in range(frame.count(b"event: bid")):
+                latencies.append((time.perf_counter() - published_at[received]) * 1000)
+                received += 1
+            if received == args.events:
+                return
+
+    async def slow_subscriber():
+        """Reads the snapshot, then stalls until every event is out; returns bid events received"""
+        received = 0
+        async for frame in broadcaster.stream(product_id, snapshot):
+            await published.wait()
+            received += frame.count(b"event: bid")
+        return received
+
+    print(f"📡 {args.subscribers} subscribers (+{args.slow} that stop reading) on one auction")
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(subscriber()) for _ in range(args.subscribers)]
+    slow = [asyncio.create_task(slow_subscriber()) for _ in range(args.slow)]
+    while sum(channel.subscribers for channel in broadcaster.channels.values()) < args.subscribers + args.slow:
+        await asyncio.sleep(0.01)
+    print(f"   Subscribed in {time.perf_counter() - start:.2f}s, "
+          f"max RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+    publish_costs = []
+    for i in range(args.events):
+        published_at.append(time.perf_counter())
+        broadcaster.publish(product_id, "bid", {"amount": 100.0 + i, "user_name": "bench", "bid_count": i + 1})
+        publish_costs.append((time.perf_counter() - published_at[-1]) * 1000)
+        await asyncio.sleep(args.interval)
+    await asyncio.gather(*tasks)
+    published.set()
+    slow_received = await asyncio.gather(*slow)
+
+    print(f"\n📊 {args.events} events x {args.subscribers} subscribers = {len(latencies)} deliveries")
+    print(f"   publish call  mean {sum(publish_costs) / len(publish_costs):7.2f} ms  p99 {percentile(publish_costs, 0.99):7.2f} ms")
+    print(f"   delivery      p50 {percentile(latencies, 0.5):7.2f} ms  p99 {percentile(latencies, 0.99):7.2f} ms  "
+          f"max {max(latencies):7.2f} ms")
+    print(f"   dropped slow consumers: {broadcaster.dropped} of {args.slow} "
+          f"(queue size {LIVE_QUEUE_SIZE}, bid events they got: {max(slow_received, default=0)})")
+
+    complete = len(latencies) == args.events * args.subscribers
+    dropped = broadcaster.dropped == args.slow and not any(slow_received)
+    print(f"\n{'✅' if complete else '❌'} every reading subscriber got all {args.events} events")
+    print(f"{'✅' if dropped else '❌'} every subscriber more than {LIVE_QUEUE_SIZE} frames behind was dropped")
+    return complete and dropped
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Login Storm Benchmark
+Measures catalog latency (GET /api/products) on its own, then again while
+a storm of concurrent POST /api/auth/login requests runs against the same
+server. With bcrypt on its bounded pool, catalog p99 should stay close to
+the baseline, and logins beyond the pool's capacity should come back as 503
+(with Retry-After) instead of queueing up.
+
+Usage:
+    BACKEND_URL=http://localhost:8001 python backend_bench_login_storm.py [--requests 300] [--logins 400] [--login-workers 64]
+
+Start the server with RATE_LIMIT_LOGIN_IP raised (e.g. 100000/1) so the
+storm reaches the bcrypt pool instead of the per-IP login limit.
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BASE_URL = os.environ.get("BACKEND_URL", "http://localhost:8001") + "/api"
+TIMEOUT = 30
+ACCOUNTS = ["techhub@example.com", "sneakerking@example.com", "fashion@example.com", "vintage@example.com"]
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+def catalog_latencies(count, workers=8):
+    """Latencies (ms) of `count` listing requests from a few steady clients"""
+    session = threading.local()
+
+    def fetch(i):
+        if not hasattr(session, "client"):
+            session.client = requests.Session()
+        start = time.perf_counter()
+        session.client.get(f"{BASE_URL}/products", params={"limit": 20, "view": "card"}, timeout=TIMEOUT)
+        return (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fetch, range(count)))
+
+def login(i):
+    response = requests.post(
+        f"{BASE_URL}/auth/login",
+        json={"email": ACCOUNTS[i % len(ACCOUNTS)], "password": "password123"},
+        timeout=TIMEOUT
+    )
+    return response.status_code
+
+def report(name, latencies):
+    print(f"   {name:22s} p50 {percentile(latencies, 0.5):7.1f} ms  p99 {percentile(latencies, 0.99):7.1f} ms  "
+          f"max {max(latencies):7.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300, help="catalog requests per phase")
+    parser.add_argument("--logins", type=int, default=400)
+    parser.add_argument("--login-workers", type=int, default=64)
+    args = parser.parse_args()
+
+    print(f"🔐 Login storm against {BASE_URL}\n")
+    catalog_latencies(20)  # warm up
+    baseline = catalog_latencies(args.requests)
+
+    statuses = Counter()
+    storm_done = threading.Event()
+
+    def storm():
+        with ThreadPoolExecutor(max_workers=args.login_workers) as pool:
+            statuses.update(pool.map(login, range(args.logins)))
+        storm_done.set()
+
+    start = time.perf_counter()
+    threading.Thread(target=storm, daemon=True).start()
+    during = catalog_latencies(args.requests)
+    storm_done.wait()
+    storm_seconds = time.perf_counter() - start
+
+    print("📊 Catalog latency (GET /api/products?limit=20&view=card)")
+    report("baseline", baseline)
+    report("during login storm", during)
+    print(f"\n   {args.logins} logins in {storm_seconds:.1f}s: " +
+          ", ".join(f"{status} x{count}" for status, count in sorted(statuses.items())))
+
+    ratio = percentile(during, 0.99) / max(percentile(baseline, 0.99), 0.001)
+    flat = ratio < 3
+    print(f"\n{'✅' if flat else '❌'} catalog p99 during the storm is {ratio:.1f}x the baseline")
+    return flat
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Search Latency Benchmark
+Seeds a synthetic catalog (100k products by default) into a scratch database
+and compares query latency of the old Mongo $text path (count_documents +
+textScore sort) with the in-memory BM25 index used by /api/products/search.
+It also reports the longest event-loop stall while a query is scored afresh,
+once in one go and once the way the route does it (search_async, which
+yields between chunks of postings), and the cost of a cached repeat.
+
+Usage:
+    python backend_bench_search.py [--products 100000] [--index-only] [--keep]
+
+Reads MONGO_URL / DB_NAME from backend/.env; the scratch database is
+"<DB_NAME>_search_bench" and is dropped afterwards unless --keep is given.
+--index-only skips Mongo entirely and times the in-memory index alone.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+
+from bson import ObjectId
+from dotenv import load_dotenv
+from seed_data import products_data
+from services.search_index import SearchIndex
+
+load_dotenv(Path(__file__).parent / "backend" / ".env")
+
+QUERIES = [
+    "macbook", "iphone pro", "playstation 5", "air jordan retro", "nike*",
+    '"air max"', "sony headphones", "vintage", "samsung galaxy -watch", "lego star wars",
+    "rolex", "dunk low", "ipad", "yeezy", "camera"
+]
+PAGE_SIZE = 20
+ADJECTIVES = ["Limited", "Classic", "Premium", "Vintage", "Special Edition", "Refurbished", "Bundle", "Rare"]
+TAILS = ["Fast shipping!", "Original packaging included.", "Excellent quality guaranteed.", "Trusted seller with high ratings."]
+
+def make_catalog(count):
+    """Synthetic products built from the seed catalog with varied names"""
+    templates = [(category, item) for category, items in products_data.items() for item in items]
+    now = datetime.utcnow()
+    products = []
+    for i in range(count):
+        category, item = templates[i % len(templates)]
+        name = f"{random.choice(ADJECTIVES)} {item['name']} #{i}"
+        products.append({
+            "_id": ObjectId(),
+            "name": name,
+            "description": f"Authentic {name} in {item.get('condition', 'New')} condition. {random.choice(TAILS)}",
+            "price": item["price"],
+            "images": [],
+            "category": category,
+            "condition": item.get("condition", "New"),
+            "listing_type": "Buy It Now",
+            "brand": item.get("brand"),
+            "is_active": True,
+            "created_at": now - timedelta(minutes=i),
+            "updated_at": now
+        })
+    return products
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda p: samples[min(len(samples) - 1, int(p * len(samples)))]
+    return statistics.mean(samples), pick(0.50), pick(0.95), pick(0.99)
+
+def report(name, samples):
+    mean, p50, p95, p99 = percentiles(samples)
+    print(f"{name:28s} mean {mean:8.2f} ms  p50 {p50:8.2f} ms  p95 {p95:8.2f} ms  p99 {p99:8.2f} ms")
+
+async def time_text_path(collection, query, rounds):
+    """The pre-index /search implementation"""
+    samples = []
+    filter_query = {"is_active": True, "$text": {"$search": query}}
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await collection.count_documents(filter_query)
+        cursor = collection.find(filter_query, {"score": {"$meta": "textScore"}}).sort(
+            [("score", {"$meta": "textScore"})]
+        ).limit(PAGE_SIZE)
+        await cursor.to_list(length=PAGE_SIZE)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+async def time_index_path(collection, index, query, rounds):
+    """Rank in memory, then one $in fetch for the page (as the route does)"""
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        hits, _ = index.search(query, limit=PAGE_SIZE + 1)
+        if collection is not None:
+            ids = [ObjectId(product_id) for product_id, _ in hits[:PAGE_SIZE]]
+            await collection.find({"_id": {"$in": ids}}).to_list(length=PAGE_SIZE)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+async def loop_stall_ms(coroutine):
+    """Run a coroutine while a ticker task records the longest event-loop stall"""
+    longest = 0.0
+    running = True
+
+    async def ticker():
+        nonlocal longest
+        last = time.perf_counter()
+        while running:
+            await asyncio.sleep(0)
+            now = time.perf_counter()
+            longest, last = max(longest, now - last), now
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    await coroutine
+    running = False
+    await task
+    return longest * 1000
+
+async def time_stalls(index, query, rounds):
+    """Longest loop stall of a fresh search in one go and via search_async, and cached search_async latency"""
+    async def blocking():
+        index.search(query, limit=PAGE_SIZE + 1)
+
+    blocking_stalls, async_stalls, cached = [], [], []
+    for _ in range(rounds):
+        blocking_stalls.append(await loop_stall_ms(blocking()))
+        index.results.clear()
+        async_stalls.append(await loop_stall_ms(index.search_async(query, limit=PAGE_SIZE + 1)))
+        start = time.perf_counter()
+        await index.search_async(query, limit=PAGE_SIZE + 1)
+        cached.append((time.perf_counter() - start) * 1000)
+    return blocking_stalls, async_stalls, cached
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--index-only", action="store_true")
+    parser.add_argument("--keep", action="store_true")
+    args = parser.parse_args()
+
+    print(f"🔍 Building {args.products} synthetic products...")
+    products = make_catalog(args.products)
+
+    index = SearchIndex()
+    start = time.perf_counter()
+    for product in products:
+        index.upsert(product)
+    print(f"   In-memory index built in {time.perf_counter() - start:.1f}s ({len(index.vocabulary)} terms)")
+
+    collection = None
+    if not args.index_only:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(os.environ["MONGO_URL"])
+        db = client[os.environ["DB_NAME"] + "_search_bench"]
+        collection = db.products
+        await collection.drop()
+        for i in range(0, len(products), 10_000):
+            await collection.insert_many(products[i:i + 10_000])
+        await collection.create_index([("name", "text"), ("description", "text")])
+        print(f"   Seeded {await collection.count_documents({})} products into {db.name}")
+
+    text_samples, index_samples = [], []
+    blocking_stalls, async_stalls, cached_samples = [], [], []
+    for query in QUERIES:
+        index_times = await time_index_path(collection, index, query, args.rounds)
+        index_samples.extend(index_times)
+        stalls = await time_stalls(index, query, args.rounds)
+        for samples, measured in zip((blocking_stalls, async_stalls, cached_samples), stalls):
+            samples.extend(measured)
+        line = (f"  {query!r:28s} index p50 {percentiles(index_times)[1]:7.2f} ms"
+                f"   loop stall {max(stalls[0]):6.2f} -> {max(stalls[1]):5.2f} ms")
+        if collection is not None:
+            text_times = await time_text_path(collection, query, args.rounds)
+            text_samples.extend(text_times)
+            line += f"   $text p50 {percentiles(text_times)[1]:7.2f} ms"
+        print(line)
+
+    print("\n📊 All queries")
+    if text_samples:
+        report("$text (count + textScore)", text_samples)
+    report("BM25 index (+ $in fetch)" if collection is not None else "BM25 index (ranking only)", index_samples)
+    report("loop stall, one go", blocking_stalls)
+    report("loop stall, search_async", async_stalls)
+    report("search_async, cached", cached_samples)
+
+    if collection is not None and not args.keep:
+        await collection.database.client.drop_database(collection.database.name)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Product Serializer Micro-benchmark
+Compares the per-item cost of the old ProductResponse + jsonable_encoder path
+with services.serializer for 100-item listing pages. Runs in-process, no server
+or database needed.
+"""
+
+import json
+import random
+import sys
+import timeit
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from models.product import ProductResponse
+from services.serializer import products_to_dicts
+import orjson
+
+PAGE_SIZE = 100
+ROUNDS = 200
+
+def make_documents(count):
+    """Build raw documents shaped like the products collection"""
+    documents = []
+    for i in range(count):
+        is_auction = i % 2 == 0
+        documents.append({
+            "_id": ObjectId(),
+            "name": f"Benchmark Product {i}",
+            "description": "Authentic benchmark product in New condition. Fast shipping!",
+            "price": round(random.uniform(10, 3000), 2),
+            "original_price": None,
+            "images": [f"https://images.example.com/{i}/{n}.jpg" for n in range(3)],
+            "category": "electronics",
+            "subcategory": None,
+            "condition": "New",
+            "listing_type": "Auction" if is_auction else "Buy It Now",
+            "seller": ObjectId(),
+            "seller_name": "TechHub_Official",
+            "is_auction": is_auction,
+            "auction_end_time": datetime.utcnow() + timedelta(days=3) if is_auction else None,
+            "current_bid": 99.0 if is_auction else None,
+            "bid_count": random.randint(0, 25),
+            "buy_it_now": not is_auction,
+            "quantity": random.randint(1, 10),
+            "brand": "Apple",
+            "rating": 4.7,
+            "review_count": random.randint(5, 500),
+            "is_active": True,
+            "created_at": datetime.utcnow(),
+            "updated_at": datetime.utcnow()
+        })
+    return documents
+
+def old_path(documents):
+    """ProductResponse validation, jsonable_encoder, then stdlib json (JSONResponse)"""
+    product_responses = []
+    for product in documents:
+        product_responses.append(ProductResponse(
+            id=str(product["_id"]),
+            name=product["name"],
+            description=product["description"],
+            price=product["price"],
+            original_price=product.get("original_price"),
+            images=product["images"],
+            category=product["category"],
+            subcategory=product.get("subcategory"),
+            condition=product["condition"],
+            listing_type=product["listing_type"],
+            seller=str(product["seller"]),
+            seller_name=product["seller_name"],
+            is_auction=product["is_auction"],
+            auction_end_time=product.get("auction_end_time"),
+            current_bid=product.get("current_bid"),
+            bid_count=product["bid_count"],
+            buy_it_now=product["buy_it_now"],
+            quantity=product["quantity"],
+            brand=product.get("brand"),
+            rating=product["rating"],
+            review_count=product["review_count"],
+            created_at=product["created_at"]
+        ))
+    payload = jsonable_encoder({"products": product_responses, "pagination": {"has_next": True}})
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def new_path(documents):
+    """Raw documents straight to orjson bytes"""
+    return orjson.dumps({"products": products_to_dicts(documents), "pagination": {"has_next": True}})
+
+def main():
+    documents = make_documents(PAGE_SIZE)
+
+    # Both paths must produce the same JSON
+    assert json.loads(old_path(documents)) == json.loads(new_path(documents))
+
+    print(f"📦 Serializing {PAGE_SIZE}-item pages, {ROUNDS} rounds each\n")
+    results = {}
+    for name, func in [("old (Pydantic + jsonable_encoder)", old_path), ("new (services.serializer)", new_path)]:
+        best = min(timeit.repeat(lambda: func(documents), number=ROUNDS, repeat=5)) / ROUNDS
+        results[name] = best
+        print(f"{name:36s} {best * 1000:8.3f} ms/page  {best / PAGE_SIZE * 1e6:8.2f} µs/item")
+
+    old, new = results.values()
+    print(f"\n🚀 Speedup: {old / new:.1f}x")
+
+if __name__ == "__main__":
+    main()